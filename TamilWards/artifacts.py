@@ -0,0 +1,185 @@
+import os
+import re
+import time
+import hashlib
+import threading
+
+from atomic import atomic_write
+
+# Rendered route maps older than this, or beyond the total size cap, are evicted
+ARTIFACT_MAX_AGE = float(os.environ.get('ARTIFACT_MAX_AGE', 24 * 3600))
+ARTIFACT_MAX_BYTES = int(os.environ.get('ARTIFACT_MAX_BYTES', 200 * 1024 * 1024))
+JANITOR_INTERVAL = float(os.environ.get('ARTIFACT_JANITOR_INTERVAL', 600))
+
+ARTIFACT_PREFIX = 'route_'
+ARTIFACT_SUFFIX = '.html'
+# Temp files left behind by a crashed writer are removed after this long
+STALE_TMP_AGE = 3600
+
+# Base layer versions (see base_layer.py) kept regardless of age, newest first
+BASE_LAYER_KEEP = int(os.environ.get('BASE_LAYER_KEEP', 3))
+BASE_LAYER_PREFIX = 'tn_assembly_base_'
+BASE_LAYER_FILE = re.compile(rf"^{BASE_LAYER_PREFIX}([0-9a-f]+)(?:_z\d+)?\.geojson$")
+
+
+def artifact_filename(html):
+    """Content-addressed name: different documents never collide.
+
+    folium gives every render fresh element ids, so two renders of one route
+    get different names; reuse comes from the response cache, whose cached
+    document maps back to the same file.
+    """
+    return f"{ARTIFACT_PREFIX}{hashlib.sha1(html.encode('utf-8')).hexdigest()[:20]}{ARTIFACT_SUFFIX}"
+
+
+def save_map_html(html, output_dir='../public'):
+    """Publish ``html`` under its content-addressed name via write-then-rename.
+
+    Readers only ever see complete files. Concurrent renders never share a
+    name, and when one cached document is re-saved by several requests at
+    once, each renames the same bytes into place.
+    """
+    filename = artifact_filename(html)
+    full_path = os.path.join(output_dir, filename)
+
+    try:
+        # Refresh the age the janitor sees
+        os.utime(full_path)
+        return filename
+    except FileNotFoundError:
+        # Never written, or the janitor just removed it: write it (again)
+        pass
+
+    os.makedirs(output_dir, exist_ok=True)
+    atomic_write(full_path, html)
+    return filename
+
+
+def sweep_artifacts(output_dir, max_age=ARTIFACT_MAX_AGE, max_bytes=ARTIFACT_MAX_BYTES):
+    """Delete expired route maps, then the oldest ones until the total fits ``max_bytes``."""
+    now = time.time()
+    files = []
+    removed = 0
+    try:
+        entries = list(os.scandir(output_dir))
+    except FileNotFoundError:
+        return 0
+
+    for entry in entries:
+        if not entry.name.startswith(ARTIFACT_PREFIX):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        is_tmp = entry.name.endswith('.tmp')
+        if not is_tmp and not entry.name.endswith(ARTIFACT_SUFFIX):
+            continue
+        age = now - stat.st_mtime
+        if (is_tmp and age > STALE_TMP_AGE) or (not is_tmp and age > max_age):
+            removed += _remove(entry.path)
+        elif not is_tmp:
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        removed += _remove(path)
+        total -= size
+    return removed
+
+
+def sweep_base_layers(output_dir, keep=BASE_LAYER_KEEP):
+    """Delete base layer versions that no route map left in ``output_dir`` can still load.
+
+    Route maps fetch their base layer by its versioned filename, and servers
+    with another dataset or ZONE_SCHEME publish their own version into the same
+    directory, so the ``keep`` most recently published versions always stay.
+    An older one goes only once it was superseded before the oldest remaining
+    route map was saved. Temp files of crashed writes go after STALE_TMP_AGE.
+    """
+    versions = {}
+    oldest_map = None
+    try:
+        entries = list(os.scandir(output_dir))
+    except FileNotFoundError:
+        return 0
+
+    now = time.time()
+    removed = 0
+    for entry in entries:
+        match = BASE_LAYER_FILE.match(entry.name)
+        is_map = entry.name.startswith(ARTIFACT_PREFIX) and entry.name.endswith(ARTIFACT_SUFFIX)
+        is_tmp = entry.name.startswith(BASE_LAYER_PREFIX) and entry.name.endswith('.tmp')
+        if match is None and not is_map and not is_tmp:
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        if is_tmp:
+            if now - mtime > STALE_TMP_AGE:
+                removed += _remove(entry.path)
+        elif is_map:
+            oldest_map = mtime if oldest_map is None else min(oldest_map, mtime)
+        else:
+            paths, published = versions.get(match.group(1), ([], 0.0))
+            versions[match.group(1)] = (paths + [entry.path], max(published, mtime))
+
+    newest_first = sorted(versions.values(), key=lambda version: version[1], reverse=True)
+    keep = max(1, keep)
+    # Pair each prunable version with the one that replaced it
+    for (paths, _), (_, superseded_at) in zip(newest_first[keep:], newest_first[keep - 1:]):
+        if oldest_map is not None and oldest_map <= superseded_at:
+            continue
+        for path in paths:
+            removed += _remove(path)
+    return removed
+
+
+def _remove(path):
+    # Another worker's janitor may have got there first
+    try:
+        os.remove(path)
+        return 1
+    except FileNotFoundError:
+        return 0
+
+
+_janitors = {}
+_janitor_lock = threading.Lock()
+
+
+def start_janitor(output_dir, interval=JANITOR_INTERVAL):
+    """Start (once per directory and process) a daemon thread that sweeps ``output_dir``."""
+    output_dir = os.path.abspath(output_dir)
+    with _janitor_lock:
+        if output_dir in _janitors:
+            return _janitors[output_dir][0]
+        stop = threading.Event()
+
+        def run():
+            while True:
+                try:
+                    # Maps first, so that evicted ones no longer pin their base layer
+                    removed = sweep_artifacts(output_dir) + sweep_base_layers(output_dir)
+                    if removed:
+                        print(f"Artifact janitor removed {removed} file(s) from {output_dir}")
+                except OSError as e:
+                    print(f"Artifact janitor error: {e}")
+                if stop.wait(interval):
+                    return
+
+        thread = threading.Thread(target=run, name='artifact-janitor', daemon=True)
+        thread.start()
+        _janitors[output_dir] = (thread, stop)
+        return thread
+
+
+def stop_janitor(output_dir):
+    """Stop the janitor started for ``output_dir``; a sweep in progress is finished first."""
+    with _janitor_lock:
+        janitor = _janitors.pop(os.path.abspath(output_dir), None)
+    if janitor is not None:
+        janitor[1].set()
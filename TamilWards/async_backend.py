@@ -0,0 +1,233 @@
+"""asyncio variant of /generate_route on aiohttp: ``python async_backend.py`` (port 5002).
+
+The OSRM fetch is awaited on a shared aiohttp session, while route scoring
+(polygon intersection) and map rendering run in a process pool, so the event
+loop itself never blocks on either. A semaphore bounds how many requests are
+computed at once; requests that cannot get a slot in time are answered 503.
+"""
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import aiohttp
+from aiohttp import web
+
+from artifacts import start_janitor, stop_janitor
+from datastore import EXCEL_FILE
+from generate_map import PROFILE_MAP, straight_line_routes
+from place_index import normalize_query
+from response_cache import json_body, make_entry, response_cache
+from route_service import (PlaceNotFound, alternatives_for, build_plan, is_fallback, parse_route_args,
+                           resolve_place, resolved_key, restore_rendered_map, route_response, warm)
+from routing import (CONNECT_TIMEOUT, OSRM_RETRIES, OSRM_URL, POOL_SIZE, READ_TIMEOUT, ROUTING_PROVIDER,
+                     LocalRouter, RouteCache, mark_fallback, parse_routes, route_key, route_request)
+from singleflight import AsyncSingleFlight
+
+ASYNC_PORT = int(os.environ.get('ASYNC_PORT', 5002))
+# Requests computed at once; others wait up to ROUTE_QUEUE_TIMEOUT seconds for a slot
+MAX_CONCURRENCY = int(os.environ.get('ROUTE_MAX_CONCURRENCY', 32))
+QUEUE_TIMEOUT = float(os.environ.get('ROUTE_QUEUE_TIMEOUT', 5))
+CPU_WORKERS = int(os.environ.get('ROUTE_CPU_WORKERS', os.cpu_count() or 2))
+
+# Same retry policy as the requests-based client
+RETRY_STATUSES = (429, 502, 503, 504)
+RETRY_BACKOFF = 0.3
+
+
+class AsyncOSRMClient:
+    """aiohttp counterpart of routing.OSRMClient; same requests, cache keys and errors."""
+
+    def __init__(self, session, base_url=OSRM_URL, cache=None, retries=OSRM_RETRIES):
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache if cache is not None else RouteCache()
+        self.retries = retries
+
+    async def routes(self, lat1, lon1, lat2, lon2, profile='driving', alternatives=False):
+        """See OSRMClient.routes; raises aiohttp.ClientError, asyncio.TimeoutError or ValueError."""
+        key = route_key(lat1, lon1, lat2, lon2, profile, alternatives)
+        # The cache may hit SQLite, so keep it off the event loop
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+
+        url, params = route_request(self.base_url, key)
+        for attempt in range(self.retries + 1):
+            last_try = attempt == self.retries
+            try:
+                async with self.session.get(url, params=params) as resp:
+                    if resp.status in RETRY_STATUSES and not last_try:
+                        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                        continue
+                    if resp.status != 200:
+                        raise ValueError(f"Status {resp.status}, Response: {(await resp.text())[:200]}")
+                    data = await resp.json(content_type=None)
+                    break
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_try:
+                    raise
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+        routes = parse_routes(data)
+        await asyncio.to_thread(self.cache.put, key, routes)
+        return routes
+
+
+# --- Process pool work (module-level so it pickles) ---
+
+def fallback_routes(lat1, lon1, lat2, lon2, profile, alternatives):
+    """What generate_map.get_routes answers when OSRM is unavailable."""
+    if ROUTING_PROVIDER != 'osrm':
+        try:
+            return LocalRouter().routes(lat1, lon1, lat2, lon2, profile, alternatives)
+        except ValueError as e:
+            print(f"Local routing error: {e}")
+    return straight_line_routes(lat1, lon1, lat2, lon2, profile)
+
+
+def compute_response(origin, destination, mode, strategy, routes, fmt, encoding, zoom, render):
+    plan = build_plan(origin, destination, mode, strategy, routes)
+    return route_response(plan, fmt, encoding, zoom, render)
+
+
+def run_cpu(app, fn, *args):
+    return asyncio.get_running_loop().run_in_executor(app['cpu_pool'], fn, *args)
+
+
+# --- HTTP ---
+
+class ServerBusy(Exception):
+    pass
+
+
+def error(message, status):
+    return web.json_response({'error': message}, status=status)
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(',')]
+    return '*' in tags or f'"{etag}"' in tags or f'W/"{etag}"' in tags
+
+
+async def fetch_routes(app, origin, destination, profile, alternatives):
+    points = (origin['lat'], origin['lng'], destination['lat'], destination['lng'])
+    if ROUTING_PROVIDER != 'local':
+        try:
+            return await app['osrm'].routes(*points, profile, alternatives)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"OSRM Error: {e!r}; falling back")
+            return mark_fallback(await run_cpu(app, fallback_routes, *points, profile, alternatives))
+    return await run_cpu(app, fallback_routes, *points, profile, alternatives)
+
+
+def resolve_request(params):
+    """(origin, destination, response cache key) for parsed /generate_route parameters."""
+    origin = resolve_place(params['from_place'])
+    destination = resolve_place(params['to_place'])
+    # Same key as the Flask endpoint, so both servers share cached responses
+    key = resolved_key('generate_route', origin, destination, params['mode'], params['strategy'], params['fmt'],
+                       params['encoding'], params['zoom'], params['render'],
+                       normalize_query(params['from_place']), normalize_query(params['to_place']))
+    return origin, destination, key
+
+
+async def generate_route(request):
+    try:
+        params = parse_route_args(request.query)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    if not os.path.exists(EXCEL_FILE):
+        return error(f"Excel file not found at {EXCEL_FILE}", 500)
+
+    try:
+        # After a data change these re-parse and hash the datasets; keep that off the event loop
+        origin, destination, key = await asyncio.to_thread(resolve_request, params)
+    except PlaceNotFound as e:
+        return error(str(e), 400)
+    except Exception as e:
+        return error(f"Failed to read Excel: {str(e)}", 500)
+    mode, strategy = params['mode'], params['strategy']
+
+    async def compute():
+        semaphore = request.app['semaphore']
+        try:
+            await asyncio.wait_for(semaphore.acquire(), QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise ServerBusy()
+        try:
+            # An earlier flight for this key may have finished while we queued
+            entry = await asyncio.to_thread(response_cache.get, key)
+            if entry is not None:
+                return entry
+            routes = await fetch_routes(request.app, origin, destination, PROFILE_MAP.get(mode, 'driving'),
+                                        alternatives_for(strategy))
+            body = await run_cpu(request.app, compute_response, origin, destination, mode, strategy, routes,
+                                 params['fmt'], params['encoding'], params['zoom'], params['render'])
+            if is_fallback(routes):
+                # OSRM was down: serve the degraded route, but don't keep it past its recovery
+                return make_entry(json_body(body))
+            return await asyncio.to_thread(response_cache.put, key, json_body(body))
+        finally:
+            semaphore.release()
+
+    try:
+        entry = await asyncio.to_thread(response_cache.get, key)
+        if entry is None:
+            # Concurrent requests for the same key await one computation and hold one slot
+            entry = await request.app['flights'].do(key, compute)
+        elif params['render']:
+            await asyncio.to_thread(restore_rendered_map, entry.body)
+    except ServerBusy:
+        return web.json_response({'error': 'Server busy, try again shortly'}, status=503,
+                                 headers={'Retry-After': str(int(QUEUE_TIMEOUT))})
+    except Exception as e:
+        return error(f"Route generation failed: {str(e)}", 500)
+
+    headers = {'ETag': f'"{entry.etag}"', 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('If-None-Match'), entry.etag):
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=entry.body, content_type=entry.content_type, headers=headers)
+
+
+@web.middleware
+async def cors(request, handler):
+    response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+async def on_startup(app):
+    app['semaphore'] = asyncio.Semaphore(MAX_CONCURRENCY)
+    app['flights'] = AsyncSingleFlight()
+    # spawn, not fork: the parent already runs an event loop and helper threads
+    app['cpu_pool'] = ProcessPoolExecutor(max_workers=CPU_WORKERS, initializer=warm,
+                                          mp_context=multiprocessing.get_context('spawn'))
+    timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+    app['http'] = aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=POOL_SIZE))
+    app['osrm'] = AsyncOSRMClient(app['http'])
+    # Place resolution runs on the loop, so its index must exist before the first request
+    await asyncio.to_thread(warm)
+    # render=true saves maps there, as in the Flask server
+    start_janitor('../public')
+
+
+async def on_cleanup(app):
+    stop_janitor('../public')
+    await app['http'].close()
+    app['cpu_pool'].shutdown(wait=False, cancel_futures=True)
+
+
+def make_app():
+    app = web.Application(middlewares=[cors])
+    app.router.add_get('/generate_route', generate_route)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(make_app(), port=ASYNC_PORT)
@@ -0,0 +1,39 @@
+"""Write-then-rename helpers: readers see the old file or the complete new one, never a partial write."""
+import os
+import threading
+from contextlib import contextmanager
+
+
+def temp_path(path):
+    """Temp file name next to ``path``, unique per process and thread."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+@contextmanager
+def atomic_path(path):
+    """Yield a temp path to write ``path``'s new contents to.
+
+    On success the temp file replaces ``path`` with one rename; on an error it
+    is removed and the error propagates.
+    """
+    tmp_path = temp_path(path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write(path, data):
+    """Atomically write ``data`` to ``path``: str as UTF-8 text, or bytes."""
+    with atomic_path(path) as tmp_path:
+        if isinstance(data, str):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        else:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
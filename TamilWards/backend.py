@@ -1,54 +1,241 @@
-from flask import Flask, request, jsonify
-from generate_map import generate_map, get_route_osrm, get_location_fuzzy
+from flask import Flask, request, jsonify, send_from_directory
+from generate_map import PROFILE_MAP, generate_map, get_routes
+from artifacts import save_map_html, start_janitor
+from route_service import (PlaceNotFound, is_fallback, parse_route_args, plan_route, resolve_place, resolved_key,
+                           restore_rendered_map, route_response, warm)
+from datastore import EXCEL_FILE
+from place_index import get_place_index, normalize_query
+from response_cache import json_body, make_entry, response_cache
+from singleflight import SingleFlight, key_lock
+from locator import locate_many
+from base_layer import PUBLIC_DIR, get_base_layer
 import os
+import math
+import numpy as np
 from flask_cors import CORS
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Correct Excel path (use raw string or os.path.join)
-excel_file = r"F:\SIH\client\TamilWards\tn_enhanced_safety_analysis_20250915_122616.xlsx"
+excel_file = EXCEL_FILE
+
+# Upper bound on place names accepted by one /resolve call
+MAX_RESOLVE_BATCH = 1000
+# Upper bound on points accepted by one POST /locate call
+MAX_LOCATE_BATCH = 10000
+
+# Identical requests arriving together share one computation: threads through
+# SingleFlight, worker processes through a lock next to the shared disk cache
+flights = SingleFlight()
+FLIGHT_LOCK_DIR = os.path.join(response_cache.directory, 'locks') if response_cache.directory else None
+
+
+def get_or_build(key, build, content_type='application/json'):
+    """Cached entry for ``key``, building it once even when many requests miss at the same time.
+
+    ``build`` returns ``(body, cacheable)``; a body that isn't cacheable (a
+    fallback route while OSRM is down) is served to this flight only. Other
+    worker processes only get the result through the disk cache, so without
+    RESPONSE_CACHE_DIR each of them builds its own.
+    """
+    def compute():
+        # Re-check inside the flight: an earlier leader may have just stored it
+        entry = response_cache.get(key)
+        if entry is None:
+            # The same across workers: one builds, the others wait and then read its entry from disk
+            with key_lock(FLIGHT_LOCK_DIR, key):
+                entry = response_cache.get(key)
+                if entry is None:
+                    body, cacheable = build()
+                    entry = (response_cache.put(key, body, content_type) if cacheable
+                             else make_entry(body, content_type))
+        return entry
+
+    entry = response_cache.get(key)
+    if entry is None:
+        entry = flights.do(key, compute)
+    return entry
+
+
+def cached_json(key, build):
+    """Serve ``build()`` as JSON through the response cache, answering If-None-Match with 304.
+
+    ``build`` returns ``(object, cacheable)`` as for get_or_build.
+    """
+    def encoded():
+        body, cacheable = build()
+        return json_body(body), cacheable
+
+    entry = get_or_build(key, encoded)
+
+    if request.if_none_match.contains(entry.etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(entry.body, mimetype=entry.content_type)
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'  # always revalidate; data can change
+    return response, entry
+
 
 @app.route('/generate_route', methods=['GET'])
 def gen_route():
-    from_place = request.args.get('from')
-    to_place = request.args.get('to')
-    mode = request.args.get('mode', 'car')
-
-    if not from_place or not to_place:
-        return jsonify({"error": "Missing 'from' or 'to' parameters"}), 400
+    try:
+        params = parse_route_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    from_place, to_place, mode = params['from_place'], params['to_place'], params['mode']
+    strategy, fmt, encoding, zoom, render = (params['strategy'], params['fmt'], params['encoding'],
+                                             params['zoom'], params['render'])
 
     # Check if Excel file exists
     if not os.path.exists(excel_file):
         return jsonify({"error": f"Excel file not found at {excel_file}"}), 500
 
     try:
-        from_lat, from_lon, _, _ = get_location_fuzzy(from_place, excel_file)
-        to_lat, to_lon, _, _ = get_location_fuzzy(to_place, excel_file)
+        origin = resolve_place(from_place)
+        destination = resolve_place(to_place)
+    except PlaceNotFound as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to read Excel: {str(e)}"}), 500
 
-    if None in [from_lat, from_lon, to_lat, to_lon]:
-        return jsonify({"error": "One or both places not found in the data"}), 400
+    # Responses echo the typed addresses, so those are part of the key too
+    key = resolved_key('generate_route', origin, destination, mode, strategy, fmt, encoding, zoom, render,
+                       normalize_query(from_place), normalize_query(to_place))
+
+    def build():
+        plan = plan_route(from_place, to_place, mode, strategy)
+        return route_response(plan, fmt, encoding, zoom, render), not plan['fallback']
 
-    # Get route
     try:
-        route_coords = get_route_osrm(from_lat, from_lon, to_lat, to_lon, profile=mode)
-        _, html = generate_map(from_place, to_place, mode)
+        response, entry = cached_json(key, build)
+        if render:
+            restore_rendered_map(entry.body)
     except Exception as e:
         return jsonify({"error": f"Route generation failed: {str(e)}"}), 500
 
+    return response
+
+
+@app.route('/suggest', methods=['GET'])
+def suggest():
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
     return jsonify({
-        'html': html,
-        'directions': route_coords,
-        'from': {'lat': from_lat, 'lng': from_lon, 'address': from_place},
-        'to': {'lat': to_lat, 'lng': to_lon, 'address': to_place},
-        'transportMode': mode,
-        'duration': len(route_coords) * 0.5,  # Placeholder
-        'distance': len(route_coords) * 0.1   # Placeholder
+        'query': query,
+        'results': get_place_index().search(query, limit=max(1, min(limit, 50)))
     }), 200
 
 
+@app.route('/resolve', methods=['POST'])
+def resolve():
+    payload = request.get_json(silent=True)
+    places = payload.get('places') if isinstance(payload, dict) else payload
+
+    if not isinstance(places, list):
+        return jsonify({"error": "Expected a JSON body like {\"places\": [\"Chennai\", ...]}"}), 400
+    if len(places) > MAX_RESOLVE_BATCH:
+        return jsonify({"error": f"At most {MAX_RESOLVE_BATCH} places per request"}), 413
+
+    try:
+        matches = get_place_index().resolve_many(places)
+    except Exception as e:
+        return jsonify({"error": f"Failed to read Excel: {str(e)}"}), 500
+
+    results = []
+    for place, match in zip(places, matches):
+        if match:
+            results.append({'query': place, 'found': True, **match})
+        else:
+            results.append({'query': place, 'found': False, 'confidence': 0.0})
+    return jsonify({'results': results}), 200
+
+
+def coordinate(value, text=False):
+    """``value`` as a finite float, or None.
+
+    JSON bodies must carry numbers (booleans are rejected even though they are
+    ints); query strings (``text``) are parsed. NaN and infinities are rejected
+    either way, as they can't be written back as JSON.
+    """
+    if text:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            number = float(value)
+        except OverflowError:
+            return None
+    else:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def located(lat, lon, match):
+    if match:
+        return {'lat': lat, 'lon': lon, 'found': True, **match}
+    return {'lat': lat, 'lon': lon, 'found': False}
+
+
+@app.route('/locate', methods=['GET', 'POST'])
+def locate():
+    if request.method == 'GET':
+        lat = coordinate(request.args.get('lat'), text=True)
+        lon = coordinate(request.args.get('lon'), text=True)
+        if lat is None or lon is None:
+            return jsonify({"error": "'lat' and 'lon' must be finite numbers"}), 400
+        points = [[lat, lon]]
+    else:
+        payload = request.get_json(silent=True)
+        points = payload.get('points') if isinstance(payload, dict) else payload
+        if not isinstance(points, list) or not all(isinstance(p, list) and len(p) == 2 for p in points):
+            return jsonify({"error": "Expected a JSON body like {\"points\": [[lat, lon], ...]}"}), 400
+        if len(points) > MAX_LOCATE_BATCH:
+            return jsonify({"error": f"At most {MAX_LOCATE_BATCH} points per request"}), 413
+        points = [[coordinate(lat), coordinate(lon)] for lat, lon in points]
+        if any(lat is None or lon is None for lat, lon in points):
+            return jsonify({"error": "Coordinates must be finite numbers"}), 400
+
+    coords = np.asarray(points, dtype=float).reshape(-1, 2)
+
+    try:
+        matches = locate_many(coords[:, 0], coords[:, 1])
+    except Exception as e:
+        return jsonify({"error": f"Lookup failed: {str(e)}"}), 500
+
+    results = [located(lat, lon, match) for (lat, lon), match in zip(coords.tolist(), matches)]
+    if request.method == 'GET':
+        return jsonify(results[0]), 200
+    return jsonify({'results': results}), 200
+
+
+@app.route('/base_layer', methods=['GET'])
+def base_layer():
+    try:
+        base = get_base_layer()
+    except Exception as e:
+        return jsonify({"error": f"Failed to build base layer: {str(e)}"}), 500
+    return jsonify({'version': base['version'], 'url': base['url'], 'levels': base['level_urls']}), 200
+
+
+@app.route('/base_layer/<version>.geojson', methods=['GET'])
+def base_layer_file(version):
+    base = get_base_layer()
+    if version != base['version']:
+        return jsonify({"error": "Unknown base layer version", "current": base['url']}), 404
+    zoom = request.args.get('zoom', type=int)
+    if zoom is not None and zoom not in base['levels']:
+        return jsonify({"error": f"'zoom' must be one of {sorted(base['levels'])}"}), 400
+    filename = base['levels'][zoom] if zoom is not None else base['filename']
+
+    # Versioned URL: contents never change, so browsers may cache it indefinitely
+    response = send_from_directory(PUBLIC_DIR, filename, mimetype='application/geo+json', max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 @app.route('/generate_and_save_route', methods=['GET'])
 def generate_and_save_route():
     from_place = request.args.get('from')
@@ -59,12 +246,33 @@ def generate_and_save_route():
         return jsonify({"error": "Missing 'from' or 'to' parameters"}), 400
 
     try:
-        filename, _ = generate_map(from_place, to_place, mode, '../public')
+        origin = resolve_place(from_place)
+        destination = resolve_place(to_place)
+        key = resolved_key('generate_and_save_route', origin, destination, mode)
+
+        # Cache the rendered document itself; the JSON body only names the file
+        def build():
+            routes = get_routes(origin['lat'], origin['lng'], destination['lat'], destination['lng'],
+                                PROFILE_MAP.get(mode, 'driving'))
+            _, html = generate_map(from_place, to_place, mode, '../public', route_coords=routes[0]['coords'],
+                                   overlay_only=True)
+            return html.encode('utf-8'), not is_fallback(routes)
+
+        entry = get_or_build(key, build, 'text/html')
+        filename = save_map_html(entry.body.decode('utf-8'), '../public')
+    except PlaceNotFound as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to generate map: {str(e)}"}), 500
 
-    return jsonify({"filename": filename}), 200
+    response = jsonify({"filename": filename})
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 
 if __name__ == '__main__':
+    # Parse the Excel/GeoJSON and check the zone settings up front instead of on the first request
+    warm()
+    start_janitor('../public')
     app.run(port=5001, debug=True)
@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+
+import geopandas as gpd
+from branca.element import MacroElement
+from jinja2 import Template
+
+from artifacts import BASE_LAYER_PREFIX
+from atomic import atomic_write
+from datastore import BASE_DIR, EXCEL_FILE, GEOJSON_FILE, store, dataset_version
+from geometry_export import ZOOM_LEVELS, quantize, simplify_boundaries
+from place_index import remove_sc_suffix
+from zones import PALETTES, get_ward_zones, scheme_signature
+
+PUBLIC_DIR = os.path.normpath(os.path.join(BASE_DIR, '..', 'public'))
+ZONES = list(PALETTES['map'].labels)
+
+# Leaflet styles applied client-side to the shared base layer
+ON_ROUTE_STYLE = {'fillOpacity': 0.6, 'color': '#000000', 'weight': 1}
+OFF_ROUTE_STYLE = {'fillOpacity': 0.1, 'color': '#888888', 'weight': 0.5}
+NO_ZONE_STYLE = {'fillColor': '#FFFFFF00', 'fillOpacity': 0, 'color': '#FFFFFF00', 'weight': 0}
+
+
+# Decimal places kept in the full-resolution export (~0.1 m)
+FULL_PRECISION = 6
+
+
+def base_layer_filename(version, zoom=None):
+    suffix = f"_z{zoom}" if zoom is not None else ""
+    return f"{BASE_LAYER_PREFIX}{version}{suffix}.geojson"
+
+
+def base_layer_url(version, zoom=None):
+    return f"/base_layer/{version}.geojson" + (f"?zoom={zoom}" if zoom is not None else "")
+
+
+def build_base_features():
+    """Assembly polygons with zone colours and labels; ``id`` is the WardIndex position."""
+    wards = store.read_geojson(GEOJSON_FILE)
+    zoned = get_ward_zones().assign(geometry=wards.geometry.values)
+
+    known = zoned['Zone'].isin(ZONES)
+    return gpd.GeoDataFrame({
+        'id': range(len(zoned)),
+        'DIST_NAME': zoned['DIST_NAME'],
+        'AC_NAME': zoned['AC_NAME'],
+        'label': [f"{d} - {remove_sc_suffix(a)}" if isinstance(a, str) else d
+                  for d, a in zip(zoned['DIST_NAME'], zoned['AC_NAME'])],
+        'Zone': zoned['Zone'].where(known, None),
+        'Zone_Color': zoned['Zone_Color'].where(known, None),
+    }, geometry=zoned.geometry.values, crs=wards.crs)
+
+
+def write_base_layer(output_dir=PUBLIC_DIR):
+    """Write the versioned base layer once; later calls for the same version only refresh its mtime.
+
+    Besides the full-resolution file, one simplified and quantized copy is
+    written per zoom in ZOOM_LEVELS. Superseded versions are pruned by the
+    artifact janitor (artifacts.sweep_base_layers).
+    """
+    # Zone colours are baked into the file, so the classification is part of its version
+    version = hashlib.sha1(f"{dataset_version()}:{scheme_signature()}".encode()).hexdigest()[:12]
+    filename = base_layer_filename(version)
+    levels = {zoom: base_layer_filename(version, zoom) for zoom in ZOOM_LEVELS}
+    paths = [os.path.join(output_dir, name) for name in [filename, *levels.values()]]
+
+    try:
+        # Already published: mark it as in use again, so the janitor counts it among the newest
+        for path in paths:
+            os.utime(path)
+    except FileNotFoundError:
+        # Never written, or the janitor pruned it: write it (again)
+        os.makedirs(output_dir, exist_ok=True)
+        features = build_base_features()
+        full = features.set_geometry(quantize(features.geometry.values, FULL_PRECISION))
+        atomic_write(paths[0], full.to_json(drop_id=True))
+        for zoom, path in zip(levels, paths[1:]):
+            simplified = features.set_geometry(simplify_boundaries(features.geometry.values, zoom))
+            atomic_write(path, simplified.to_json(drop_id=True))
+        print(f"Base layer written: {paths[0]} (+{len(levels)} zoom levels)")
+
+    return {'version': version, 'filename': filename, 'path': paths[0], 'url': base_layer_url(version),
+            'levels': levels, 'level_urls': {zoom: base_layer_url(version, zoom) for zoom in levels}}
+
+
+def get_base_layer(output_dir=PUBLIC_DIR):
+    # One cache entry per directory, however the caller spells it ('../public' or PUBLIC_DIR)
+    output_dir = os.path.abspath(output_dir)
+    return store.derived(('base_layer', output_dir), [GEOJSON_FILE, EXCEL_FILE],
+                         lambda: write_base_layer(output_dir))
+
+
+class RouteOverlay(MacroElement):
+    """Loads the shared base layer into a folium map and highlights the given ward ids.
+
+    The map HTML then carries only ids and styles instead of every polygon.
+    """
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var map = {{ this._parent.get_name() }};
+            var levels = {{ this.levels }};
+            var highlight = new Set({{ this.highlight }});
+            var onRoute = {{ this.on_route }}, offRoute = {{ this.off_route }}, noZone = {{ this.no_zone }};
+            var layer = null, current = null;
+
+            // Load the simplified copy for the deepest exported zoom not above the map's zoom
+            function levelFor(zoom) {
+                var zooms = Object.keys(levels).map(Number).sort(function(a, b) { return a - b; });
+                var pick = zooms[0];
+                zooms.forEach(function(z) { if (z <= zoom) { pick = z; } });
+                return pick;
+            }
+
+            function load() {
+                var level = levelFor(map.getZoom());
+                if (level === current) { return; }
+                current = level;
+                fetch(levels[level]).then(function(resp) { return resp.json(); }).then(function(data) {
+                    if (level !== current) { return; }
+                    var next = L.geoJson(data, {
+                        style: function(feature) {
+                            var p = feature.properties;
+                            if (!p.Zone_Color) { return noZone; }
+                            return Object.assign({fillColor: p.Zone_Color}, highlight.has(p.id) ? onRoute : offRoute);
+                        },
+                        onEachFeature: function(feature, featureLayer) {
+                            if (feature.properties.Zone_Color && highlight.has(feature.properties.id)) {
+                                featureLayer.bindTooltip(feature.properties.label);
+                            }
+                        }
+                    }).addTo(map).bringToBack();
+                    if (layer) { map.removeLayer(layer); }
+                    layer = next;
+                });
+            }
+
+            map.on('zoomend', load);
+            load();
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, levels, highlight):
+        """``levels`` maps zoom -> base layer URL (relative to the page)."""
+        super().__init__()
+        self._name = 'RouteOverlay'
+        self.levels = json.dumps({str(zoom): url for zoom, url in levels.items()})
+        self.highlight = json.dumps([int(i) for i in highlight])
+        self.on_route = json.dumps(ON_ROUTE_STYLE)
+        self.off_route = json.dumps(OFF_ROUTE_STYLE)
+        self.no_zone = json.dumps(NO_ZONE_STYLE)
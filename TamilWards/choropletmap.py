@@ -4,15 +4,17 @@ import folium
 from folium.plugins import MarkerCluster
 import re
 
+from datastore import get_safety_data, get_wards
+
 # Function to clean assembly name by removing bracketed text like (SC), (ST)
 def clean_ac_name(ac_name):
     return re.sub(r"\s*\(.*?\)", "", str(ac_name)).strip()
 
 # Step 1: Load Assembly GeoJSON polygon data
-wards_gdf = gpd.read_file('F:\SIH\client\TamilWards\TAMIL NADU_ASSEMBLY.geojson')  # Your geometry file
+wards_gdf = get_wards()  # Reads the GeoParquet copy when present
 
 # Step 2: Load the safety score Excel and make points GeoDataFrame
-df = pd.read_excel('F:\SIH\client\TamilWards\tn_enhanced_safety_analysis_20250915_122616.xlsx')
+df = get_safety_data().copy()  # Reads the Parquet copy when present
 points_gdf = gpd.GeoDataFrame(
     df,
     geometry=gpd.points_from_xy(df['Longitude'], df['Latitude']),
@@ -0,0 +1,319 @@
+"""asyncio crawl engine for the crime-data collector in web.py.
+
+Every source query of every constituency is scheduled at once on one pooled
+aiohttp session. What keeps that polite is per-host pacing instead of the
+collector sleeping REQUEST_DELAY after each fetch: at most
+CRAWL_HOST_CONCURRENCY requests are open against any one site, a token
+bucket holds each site to CRAWL_HOST_RATE requests per second, 429s and
+Retry-After slow a site down, and a site that keeps failing is skipped for a
+while (ratelimit.py). The listing pages that are the same for every
+location (web.SHARED_LISTINGS) are fetched and parsed once per run, and all
+constituency names are matched against them in one pass. Pages are parsed
+with the same functions as the synchronous CrimeDataCollector, in worker
+threads, so the results match.
+
+CRAWL_HOST_OVERRIDES redirects hosts, e.g. to local stub servers::
+
+    CRAWL_HOST_OVERRIDES="news.google.com=http://127.0.0.1:8001,www.thehindu.com=http://127.0.0.1:8002"
+"""
+import os
+import time
+import asyncio
+import logging
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from http_cache import CACHE_FILE, OFFLINE, HttpCache
+from ratelimit import CircuitBreaker, TokenBucket, backoff_delay, retry_after_seconds
+from web import (SHARED_LISTINGS, baseline_result, combine_crime_data, estimated_crime_statistics,
+                 fallback_crime_data, get_random_headers, google_news_urls, location_result, match_listing_page,
+                 parse_google_news, parse_listing, the_hindu_urls)
+
+logger = logging.getLogger(__name__)
+
+# Open requests per host, and across all hosts
+HOST_CONCURRENCY = int(os.environ.get('CRAWL_HOST_CONCURRENCY', 4))
+POOL_SIZE = int(os.environ.get('CRAWL_POOL_SIZE', 64))
+REQUEST_TIMEOUT = float(os.environ.get('CRAWL_TIMEOUT', 15))
+PROGRESS_EVERY = 10
+
+# Requests per second per host (<= 0: unlimited) and the burst allowed above it
+HOST_RATE = float(os.environ.get('CRAWL_HOST_RATE', 2))
+HOST_BURST = int(os.environ.get('CRAWL_HOST_BURST', 4))
+
+# Retries of 429/5xx answers and network errors, with jittered exponential backoff
+RETRIES = int(os.environ.get('CRAWL_RETRIES', 3))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+BACKOFF_BASE = float(os.environ.get('CRAWL_BACKOFF', 0.5))
+BACKOFF_MAX = float(os.environ.get('CRAWL_BACKOFF_MAX', 30))
+RETRY_AFTER_MAX = float(os.environ.get('CRAWL_RETRY_AFTER_MAX', 120))
+
+# A host failing this many times in a row is skipped for BREAKER_COOLDOWN seconds
+BREAKER_FAILURES = int(os.environ.get('CRAWL_BREAKER_FAILURES', 5))
+BREAKER_COOLDOWN = float(os.environ.get('CRAWL_BREAKER_COOLDOWN', 60))
+
+
+def parse_host_map(spec):
+    """``"host=value,..."`` -> {host: value}"""
+    values = {}
+    for entry in spec.split(','):
+        if '=' in entry:
+            host, value = entry.split('=', 1)
+            values[host.strip()] = value.strip()
+    return values
+
+
+HOST_OVERRIDES = {host: base.rstrip('/')
+                  for host, base in parse_host_map(os.environ.get('CRAWL_HOST_OVERRIDES', '')).items()}
+# Per-host rates replacing HOST_RATE, e.g. CRAWL_HOST_RATES="news.google.com=1"
+HOST_RATES = {host: float(rate) for host, rate in parse_host_map(os.environ.get('CRAWL_HOST_RATES', '')).items()}
+# Per-host cache TTLs in seconds replacing CRAWL_CACHE_TTL, e.g. CRAWL_FRESHNESS="news.google.com=3600"
+HOST_FRESHNESS = {host: float(ttl) for host, ttl in parse_host_map(os.environ.get('CRAWL_FRESHNESS', '')).items()}
+
+
+class Host:
+    """What the collector tracks per host: open-request slots, request budget and health"""
+
+    def __init__(self, concurrency, rate, burst):
+        self.slots = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_COOLDOWN)
+
+
+class AsyncCrimeDataCollector:
+    """asyncio counterpart of web.CrimeDataCollector over a shared session.
+
+    The collector is shared by all constituencies of a run; the per-host
+    semaphores are what bound the load each site sees.
+    """
+
+    def __init__(self, session, host_concurrency=HOST_CONCURRENCY, host_overrides=None, host_rates=None,
+                 retries=RETRIES, cache=None, offline=OFFLINE):
+        self.session = session
+        self.host_concurrency = host_concurrency
+        self.host_overrides = HOST_OVERRIDES if host_overrides is None else host_overrides
+        self.host_rates = HOST_RATES if host_rates is None else host_rates
+        self.retries = retries
+        self._hosts = {}
+        self.fetches = 0
+        self.failures = 0
+        self.retried = 0
+        self.skipped = 0
+        self.cache = cache
+        self.offline = offline
+        self.cache_hits = 0
+        self.revalidated = 0
+        self.stale = 0
+
+    def _target(self, url):
+        """(host, url actually requested) for ``url``"""
+        parts = urlsplit(url)
+        base = self.host_overrides.get(parts.netloc)
+        if base is None:
+            return parts.netloc, url
+        return parts.netloc, base + url[len(f"{parts.scheme}://{parts.netloc}"):]
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = Host(self.host_concurrency, self.host_rates.get(host, HOST_RATE), HOST_BURST)
+        return state
+
+    async def _get(self, state, target, headers):
+        """(status, body, response headers) of one request; status None on a network error"""
+        async with state.slots:
+            await state.bucket.acquire()
+            self.fetches += 1
+            try:
+                async with self.session.get(target, headers={**get_random_headers(), **headers}) as response:
+                    body = await response.read() if response.status == 200 else None
+                    return response.status, body, response.headers
+            except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+                logger.warning(f"Exception fetching {target}: {ex!r}")
+                return None, None, None
+
+    async def _download(self, host, target, headers):
+        """(status, body, response headers) of ``target`` after retries; status None if the host gave no answer.
+
+        Requests to a host wait for a slot and a token of its bucket. 429 and
+        5xx answers and network errors are retried after the server's
+        Retry-After or a jittered exponential backoff; a 429 also halves the
+        host's rate and Retry-After holds back all of its requests. Hosts that
+        keep failing are skipped until their circuit breaker lets a probe through.
+        """
+        state = self._host(host)
+        status = body = response_headers = None
+
+        for attempt in range(self.retries + 1):
+            if not state.breaker.allow():
+                self.skipped += 1
+                return None, None, None
+
+            status, body, response_headers = await self._get(state, target, headers)
+            if status == 200:
+                state.breaker.success()
+                state.bucket.recover()
+                return status, body, response_headers
+            if status is not None and status not in RETRY_STATUSES:
+                # The host answered: 304, or this page just isn't there
+                state.breaker.success()
+                return status, body, response_headers
+
+            self.failures += 1
+            state.breaker.failure()
+            if status == 429:
+                state.bucket.slow_down()
+            if attempt == self.retries:
+                break
+            self.retried += 1
+            retry_after = None
+            if response_headers is not None:
+                retry_after = retry_after_seconds(response_headers.get('Retry-After'), RETRY_AFTER_MAX)
+            if retry_after is not None:
+                state.bucket.pause(retry_after)
+            else:
+                await asyncio.sleep(backoff_delay(attempt, BACKOFF_BASE, BACKOFF_MAX))
+
+        if state.breaker.is_open:
+            logger.warning(f"Skipping {host} for {BREAKER_COOLDOWN:.0f}s after repeated failures")
+        return status, body, response_headers
+
+    async def fetch(self, url):
+        """Body of ``url``, or None on a non-200 answer, a network error or an open circuit.
+
+        With a cache, a fresh copy is served without a request and a stale one
+        is revalidated with a conditional GET; when the host is down or
+        throttling us the stale copy is served rather than nothing. Offline,
+        only the cache answers.
+        """
+        host, target = self._target(url)
+        cached = await asyncio.to_thread(self.cache.get, url) if self.cache is not None else None
+        if cached is not None and (self.offline or self.cache.is_fresh(cached, host)):
+            self.cache_hits += 1
+            return cached.body
+        if self.offline:
+            return None
+
+        headers = self.cache.conditional_headers(cached) if cached is not None else {}
+        status, body, response_headers = await self._download(host, target, headers)
+        if status == 200:
+            if self.cache is not None:
+                await asyncio.to_thread(self.cache.put, url, body, response_headers.get('ETag'),
+                                        response_headers.get('Last-Modified'))
+            return body
+        if cached is not None and status == 304:
+            self.revalidated += 1
+            await asyncio.to_thread(self.cache.touch, url)
+            return cached.body
+        if cached is not None and (status is None or status in RETRY_STATUSES):
+            self.stale += 1
+            return cached.body
+        return None
+
+    async def search(self, urls, parse):
+        """Fetch ``urls`` concurrently and sum ``parse(content, url)`` over the pages that answered."""
+        pages = await asyncio.gather(*(self.fetch(url) for url in urls))
+        crime_count = 0
+        references = []
+        for url, content in zip(urls, pages):
+            if content is None:
+                continue
+            try:
+                # BeautifulSoup is CPU-bound; keep it off the event loop
+                count, refs = await asyncio.to_thread(parse, content, url)
+            except Exception as ex:
+                logger.warning(f"Exception parsing {url}: {ex}")
+                continue
+            crime_count += count
+            references.extend(refs)
+        return crime_count, references
+
+    def google_news(self, location):
+        return self.search(google_news_urls(location), lambda content, url: parse_google_news(content, location))
+
+    def the_hindu(self, location):
+        return self.search(the_hindu_urls(location),
+                           lambda content, url: parse_listing(content, url, location, 'The Hindu'))
+
+    async def shared_listings(self, locations):
+        """{source: {location: (count, refs)}} for the SHARED_LISTINGS pages.
+
+        Each page is fetched and parsed once and every location is matched
+        against its article table in one pass; a page that could not be
+        fetched or parsed counts as no articles.
+        """
+        sources = list(SHARED_LISTINGS)
+        pages = await asyncio.gather(*(self.fetch(SHARED_LISTINGS[source]) for source in sources))
+        shared = {}
+        for source, content in zip(sources, pages):
+            shared[source] = {}
+            if content is None:
+                continue
+            try:
+                shared[source] = await asyncio.to_thread(match_listing_page, content, SHARED_LISTINGS[source],
+                                                         locations, source)
+            except Exception as ex:
+                logger.warning(f"Exception parsing {SHARED_LISTINGS[source]}: {ex}")
+        return shared
+
+    async def get_comprehensive_crime_data(self, location, shared=None):
+        """Same result as CrimeDataCollector.get_comprehensive_crime_data, sources fetched concurrently.
+
+        ``shared`` is the shared_listings() result of the whole run; without
+        it the shared pages are fetched for this location alone.
+        """
+        try:
+            if shared is None:
+                shared = await self.shared_listings([location])
+            results = await asyncio.gather(self.google_news(location), self.the_hindu(location))
+            listings = [shared[source].get(location, (0, [])) for source in SHARED_LISTINGS]
+            return combine_crime_data(location, [*results, *listings, estimated_crime_statistics(location)])
+        except Exception as e:
+            logger.error(f"Error getting comprehensive crime data for {location}: {e}")
+            return fallback_crime_data(location)
+
+    async def analyze(self, item, shared=None):
+        """Report row for ``item`` = (DIST_NAME, AC_NAME, latitude, longitude)"""
+        dist_name, ac_name = item[0], item[1]
+        try:
+            return location_result(item, *await self.get_comprehensive_crime_data(ac_name or dist_name, shared))
+        except Exception as e:
+            logger.error(f"❌ Error analyzing {dist_name}-{ac_name}: {e}")
+            return baseline_result(item)
+
+
+async def collect_all(items, host_concurrency=HOST_CONCURRENCY, host_overrides=None, host_rates=None, cache=None,
+                      offline=OFFLINE):
+    """Report rows for all ``items``, in completion order.
+
+    ``cache`` defaults to an HttpCache at CRAWL_CACHE_FILE (none if that is set empty).
+    """
+    if cache is None and CACHE_FILE:
+        cache = HttpCache(freshness=HOST_FRESHNESS)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    # Per-host limits are the semaphores, keyed by the original host even when overridden
+    connector = aiohttp.TCPConnector(limit=POOL_SIZE)
+    started = time.perf_counter()
+    results = []
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        collector = AsyncCrimeDataCollector(session, host_concurrency, host_overrides, host_rates, cache=cache,
+                                            offline=offline)
+        # Phase one: the pages every location shares, once for the whole run
+        shared = await collector.shared_listings([ac_name or dist_name for dist_name, ac_name, *_ in items])
+        # Phase two: the per-location searches
+        tasks = [asyncio.ensure_future(collector.analyze(item, shared)) for item in items]
+        try:
+            for i, task in enumerate(asyncio.as_completed(tasks), 1):
+                results.append(await task)
+                if i % PROGRESS_EVERY == 0:
+                    logger.info(f"📈 Progress: {i}/{len(items)} locations processed")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    logger.info(f"🌐 {collector.fetches} fetches ({collector.failures} failed, {collector.retried} retried, "
+                f"{collector.skipped} skipped by open circuits) in {time.perf_counter() - started:.1f}s; cache: "
+                f"{collector.cache_hits} hits, {collector.revalidated} not modified, {collector.stale} stale")
+    return results
@@ -0,0 +1,244 @@
+"""Read-only, memory-mapped bundle of the datasets, shared by all server workers.
+
+Layout under BUNDLE_DIR::
+
+    CURRENT                  name of the live version directory
+    <version>/manifest.json  source digests, column specs, geometry type, CRS
+    <version>/table/*.npy    safety table columns
+    <version>/wards/*.npy    boundary attribute columns, ragged coordinates and offsets
+
+Numeric columns are plain .npy arrays and string columns use the Arrow layout
+(UTF-8 bytes + int32 offsets + optional validity bitmap), so opening a bundle
+maps files instead of parsing them and every worker shares the same
+page-cache pages. Polygons are rebuilt from the mapped coordinates because
+GEOS keeps its own copy; that is the one per-process cost.
+
+Publishing writes a new version directory and then swaps CURRENT with
+os.replace, so a data refresh is a single atomic rename. Build one with
+``python dataset_bundle.py``.
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+from atomic import atomic_write
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+BUNDLE_DIR = os.environ.get('DATASET_BUNDLE_DIR',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bundle'))
+POINTER = 'CURRENT'
+
+# Versions kept on disk after a swap; workers still mapping a removed one keep working
+KEEP_VERSIONS = 2
+
+
+# --- Writing ---
+
+def _save(directory, name, array):
+    np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(array))
+
+
+def _write_columns(frame, directory):
+    os.makedirs(directory)
+    specs = []
+    for i, name in enumerate(frame.columns):
+        column = frame[name]
+        spec = {'name': name, 'file': f"c{i}"}
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind in 'biufmM':
+            spec['kind'] = 'array'
+            _save(directory, spec['file'], column.to_numpy())
+        else:
+            valid = column.notna().to_numpy()
+            encoded = [str(v).encode('utf-8') if ok else b'' for v, ok in zip(column.tolist(), valid)]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+            spec.update(kind='string', nulls=int((~valid).sum()))
+            _save(directory, f"{spec['file']}.data", np.frombuffer(b''.join(encoded), dtype=np.uint8))
+            _save(directory, f"{spec['file']}.offsets", offsets)
+            if spec['nulls']:
+                _save(directory, f"{spec['file']}.valid", np.packbits(valid, bitorder='little'))
+        specs.append(spec)
+    return {'rows': len(frame), 'columns': specs}
+
+
+def write_bundle(table, table_digest, wards, wards_digest, root=BUNDLE_DIR):
+    """Write a bundle of ``table`` and ``wards`` and make it current; returns its version.
+
+    The digests are those of the source files (DatasetStore.digest), which is
+    how readers tell whether the bundle matches the files they were asked for.
+    """
+    version = hashlib.sha1(f"{table_digest}:{wards_digest}".encode()).hexdigest()[:12]
+    target = os.path.join(root, version)
+
+    if not os.path.isdir(target):
+        tmp_dir = os.path.join(root, f".{version}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        kind, coords, offsets = shapely.to_ragged_array(np.asarray(wards.geometry.values))
+        wards_dir = os.path.join(tmp_dir, 'wards')
+        manifest = {
+            'version': version,
+            'sources': {'table': table_digest, 'wards': wards_digest},
+            'table': _write_columns(table, os.path.join(tmp_dir, 'table')),
+            'wards': _write_columns(wards.drop(columns=wards.geometry.name), wards_dir),
+            'geometry': {'name': wards.geometry.name, 'type': int(kind), 'offsets': len(offsets),
+                         'crs': wards.crs.to_json() if wards.crs is not None else None},
+        }
+        _save(wards_dir, 'coords', coords)
+        for i, offset in enumerate(offsets):
+            _save(wards_dir, f"offsets{i}", offset)
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        try:
+            os.replace(tmp_dir, target)
+        except OSError:
+            # Another process published the same version first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    atomic_write(os.path.join(root, POINTER), version)
+    prune(root, keep=version)
+    return version
+
+
+def prune(root=BUNDLE_DIR, keep=None, versions=KEEP_VERSIONS):
+    """Remove all but the newest ``versions`` bundle directories (never ``keep``)."""
+    entries = [e for e in os.scandir(root) if e.is_dir() and not e.name.startswith('.') and e.name != keep]
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in entries[max(0, versions - 1):]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+# --- Reading ---
+
+def _load(directory, name):
+    path = os.path.join(directory, f"{name}.npy")
+    try:
+        # Plain ndarray view of the mapping, so results of operations aren't memmaps
+        return np.asarray(np.load(path, mmap_mode='r'))
+    except ValueError:
+        # Zero-length arrays cannot be mapped
+        return np.load(path)
+
+
+def _string_column(directory, spec, rows):
+    data = _load(directory, f"{spec['file']}.data")
+    offsets = _load(directory, f"{spec['file']}.offsets")
+    valid = _load(directory, f"{spec['file']}.valid") if spec['nulls'] else None
+
+    if pa is None:
+        # Without pyarrow the strings have to be materialized per process
+        raw = data.tobytes()
+        values = [raw[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(rows)]
+        if valid is not None:
+            mask = np.unpackbits(valid, count=rows, bitorder='little').astype(bool)
+            values = [v if ok else None for v, ok in zip(values, mask)]
+        return pd.Series(values, dtype=object)
+
+    array = pa.StringArray.from_buffers(
+        rows, pa.py_buffer(offsets), pa.py_buffer(data),
+        null_bitmap=pa.py_buffer(valid) if valid is not None else None, null_count=spec['nulls'])
+    try:
+        dtype = pd.StringDtype('pyarrow', na_value=np.nan)
+    except TypeError:
+        dtype = pd.StringDtype('pyarrow')
+    return pd.Series(pd.array(array, dtype=dtype))
+
+
+def _read_columns(directory, layout):
+    columns = {}
+    for spec in layout['columns']:
+        if spec['kind'] == 'array':
+            columns[spec['name']] = _load(directory, spec['file'])
+        else:
+            columns[spec['name']] = _string_column(directory, spec, layout['rows'])
+    return pd.DataFrame(columns, copy=False)
+
+
+class DatasetBundle:
+    """One opened bundle version; frames are built once and share the mapped arrays."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest['version']
+        self._lock = threading.Lock()
+        self._table = None
+        self._wards = None
+
+    def matches(self, name, digest):
+        return self.manifest['sources'].get(name) == digest
+
+    def table(self):
+        with self._lock:
+            if self._table is None:
+                self._table = _read_columns(os.path.join(self.path, 'table'), self.manifest['table'])
+            return self._table
+
+    def wards(self):
+        with self._lock:
+            if self._wards is None:
+                directory = os.path.join(self.path, 'wards')
+                geometry = self.manifest['geometry']
+                offsets = tuple(_load(directory, f"offsets{i}") for i in range(geometry['offsets']))
+                geoms = shapely.from_ragged_array(shapely.GeometryType(geometry['type']),
+                                                  _load(directory, 'coords'), offsets)
+                self._wards = gpd.GeoDataFrame(_read_columns(directory, self.manifest['wards']),
+                                               geometry=gpd.GeoSeries(geoms, name=geometry['name']),
+                                               crs=geometry['crs'])
+            return self._wards
+
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def bundle_stamp(root=BUNDLE_DIR):
+    """mtime of the CURRENT pointer, or None without a bundle; changes on every swap."""
+    try:
+        return os.stat(os.path.join(root, POINTER)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def current_bundle(root=BUNDLE_DIR):
+    """The bundle CURRENT points at, or None."""
+    try:
+        with open(os.path.join(root, POINTER), encoding='utf-8') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+
+    path = os.path.join(root, version)
+    with _bundles_lock:
+        bundle = _bundles.get(path)
+        if bundle is None:
+            try:
+                bundle = DatasetBundle(path)
+            except FileNotFoundError:
+                return None
+            # Only the live version stays referenced; older maps go away with their frames
+            _bundles.clear()
+            _bundles[path] = bundle
+        return bundle
+
+
+if __name__ == '__main__':
+    from datastore import EXCEL_FILE, GEOJSON_FILE, get_safety_data, get_wards, store
+
+    table, wards = get_safety_data(), get_wards()
+    version = write_bundle(table, store.digest(EXCEL_FILE), wards, store.digest(GEOJSON_FILE))
+    print(f"Dataset bundle {version} is current in {BUNDLE_DIR}")
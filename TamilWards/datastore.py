@@ -0,0 +1,237 @@
+import io
+import os
+import glob
+import threading
+import time
+import hashlib
+
+import pandas as pd
+import geopandas as gpd
+
+from atomic import atomic_path
+from dataset_bundle import bundle_stamp, current_bundle
+
+# Data files live next to this module
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Reports written by the crawler (web.py): tn_enhanced_safety_analysis_<YYYYmmdd_HHMMSS>.xlsx
+REPORT_PREFIX = 'tn_enhanced_safety_analysis_'
+
+
+def latest_report(directory=BASE_DIR):
+    """Newest crawler report in ``directory``; the timestamped names sort by age."""
+    reports = sorted(glob.glob(os.path.join(glob.escape(directory), f"{REPORT_PREFIX}*.xlsx")))
+    return reports[-1] if reports else os.path.join(directory, f"{REPORT_PREFIX}20250915_122616.xlsx")
+
+
+# Resolved once per process: a new report is picked up on the next start
+EXCEL_FILE = latest_report()
+GEOJSON_FILE = os.path.join(BASE_DIR, 'TAMIL NADU_ASSEMBLY.geojson')
+
+# How often (seconds) a cached file is re-stat'ed for changes
+CHECK_INTERVAL = float(os.environ.get('DATASET_CHECK_INTERVAL', 2.0))
+
+# Keep a Parquet copy next to each dataset and read that instead of re-parsing
+# the xlsx/GeoJSON (needs pyarrow; set DATASET_COLUMNAR=0 to disable)
+COLUMNAR = os.environ.get('DATASET_COLUMNAR', '1') != '0'
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PARQUET = True
+except ImportError:
+    HAVE_PARQUET = False
+
+# Parquet metadata key holding the SHA-1 of the source file a copy was written from
+SOURCE_DIGEST_KEY = b'tamilwards.source_sha1'
+
+
+def columnar_path(path):
+    """Parquet sibling of a dataset file: ``x.xlsx`` -> ``x.parquet``."""
+    return os.path.splitext(path)[0] + '.parquet'
+
+
+def _arrow_table(frame):
+    # Through to_parquet so the pandas/GeoParquet schema metadata is exactly what the readers expect
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, index=False)
+    return pq.read_table(pa.BufferReader(buffer.getvalue()))
+
+
+def columnar_digest(target):
+    """Source digest recorded in a Parquet copy, or None."""
+    try:
+        metadata = pq.read_schema(target).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    digest = metadata.get(SOURCE_DIGEST_KEY)
+    return digest.decode() if digest else None
+
+
+def write_columnar(frame, path, digest=None):
+    """Atomically write ``frame`` as the Parquet (GeoParquet for GeoDataFrames) copy of ``path``.
+
+    The copy records ``digest`` (by default that of ``path`` as it is now),
+    which is what readers check it against.
+    """
+    target = columnar_path(path)
+    try:
+        table = _arrow_table(frame)
+        digest = digest or file_digest(path)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_DIGEST_KEY: digest.encode()})
+        with atomic_path(target) as tmp_path:
+            pq.write_table(table, tmp_path)
+        return target
+    except Exception as e:
+        # Mixed-type columns, read-only data directory, ...: keep using the source file
+        print(f"Could not write {target}: {e}")
+        return None
+
+
+def _read_preferring_columnar(path, digest, read_source, read_columnar):
+    if not (COLUMNAR and HAVE_PARQUET):
+        return read_source(path)
+    target = columnar_path(path)
+    digest = digest or file_digest(path)
+    # Only trust a copy written from these exact source contents; mtimes lie after cp -p, rsync -a, checkouts
+    if columnar_digest(target) == digest:
+        return read_columnar(target)
+    frame = read_source(path)
+    write_columnar(frame, path, digest)
+    return frame
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _bundled(name, digest):
+    """The memory-mapped bundle if it was built from this exact source file."""
+    bundle = current_bundle()
+    if bundle is not None and digest is not None and bundle.matches(name, digest):
+        return bundle
+    return None
+
+
+def load_table(path, digest=None):
+    bundle = _bundled('table', digest)
+    if bundle is not None:
+        return bundle.table()
+    return _read_preferring_columnar(path, digest, pd.read_excel, pd.read_parquet)
+
+
+def load_boundaries(path, digest=None):
+    bundle = _bundled('wards', digest)
+    if bundle is not None:
+        return bundle.wards()
+    return _read_preferring_columnar(path, digest, gpd.read_file, gpd.read_parquet)
+
+
+class DatasetStore:
+    """Process-wide cache of parsed data files, reloaded when their mtime changes.
+
+    When a dataset bundle built from the same file contents is current, the
+    frames come from its memory-mapped arrays instead of a parse.
+
+    Frames handed out are shared between requests and must be treated as
+    read-only; call ``.copy()`` before adding or modifying columns.
+    """
+
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._files = {}     # path -> {'mtime', 'checked', 'value', 'digest', 'loader'}
+        self._derived = {}   # name -> (source mtimes, value)
+
+    def _mtime(self, path):
+        # Swapping the dataset bundle counts as a change to every file
+        return (os.stat(path).st_mtime_ns, bundle_stamp())
+
+    def _load(self, path, loader):
+        entry = self._files.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry['checked'] < self.check_interval:
+            return entry
+
+        with self._lock:
+            entry = self._files.get(path)
+            mtime = self._mtime(path)
+            if entry is not None and entry['mtime'] == mtime:
+                entry['checked'] = now
+                return entry
+
+            digest = file_digest(path)
+            value = loader(path, digest)
+            if entry is not None:
+                print(f"Reloaded dataset: {path}")
+            entry = {'mtime': mtime, 'checked': now, 'value': value, 'digest': digest, 'loader': loader}
+            self._files[path] = entry
+            return entry
+
+    def _version(self, path):
+        entry = self._files.get(path)
+        if entry is None:
+            return None
+        return self._load(path, entry['loader'])['mtime']
+
+    def read_excel(self, path):
+        return self._load(path, load_table)['value']
+
+    def read_geojson(self, path):
+        return self._load(path, load_boundaries)['value']
+
+    def digest(self, path):
+        """Content hash of a loaded file, usable as a data version."""
+        with self._lock:
+            entry = self._files.get(path)
+        return entry['digest'] if entry else None
+
+    def derived(self, name, paths, builder):
+        """Return ``builder()`` cached until any of ``paths`` is reloaded.
+
+        Used for structures computed from the datasets (indexes, merged
+        layers) so they are built once per data version, not per request.
+        """
+        versions = tuple(self._version(p) for p in paths)
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] == versions and None not in versions:
+            return cached[1]
+
+        with self._lock:
+            value = builder()
+            # Re-read versions: builder() may have triggered the first load
+            versions = tuple(self._files[p]['mtime'] for p in paths)
+            self._derived[name] = (versions, value)
+            return value
+
+
+store = DatasetStore()
+
+
+def get_safety_data(excel_file=EXCEL_FILE):
+    return store.read_excel(excel_file)
+
+
+def get_wards(geojson_file=GEOJSON_FILE):
+    return store.read_geojson(geojson_file)
+
+
+def dataset_version():
+    """Short hash of the current safety workbook and boundary file contents."""
+    get_safety_data()
+    get_wards()
+    combined = f"{store.digest(EXCEL_FILE)}:{store.digest(GEOJSON_FILE)}"
+    return hashlib.sha1(combined.encode()).hexdigest()[:12]
+
+
+def preload():
+    """Load every dataset up front, e.g. before the server starts accepting requests."""
+    get_safety_data()
+    if os.path.exists(GEOJSON_FILE):
+        get_wards()
+
+
+if __name__ == '__main__':
+    # Refresh the Parquet copies, e.g. after replacing the xlsx/GeoJSON by hand
+    for source, read in ((EXCEL_FILE, pd.read_excel), (GEOJSON_FILE, gpd.read_file)):
+        if os.path.exists(source):
+            print(f"{source} -> {write_columnar(read(source), source)}")
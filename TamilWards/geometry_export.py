@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import shapely
+from shapely.geometry import LineString
+
+# Zoom levels the base layer is exported at; the client picks the closest one not above its zoom
+ZOOM_LEVELS = (7, 9, 11, 13)
+
+# Zoom at which rendered route polylines must stay visually unchanged
+ROUTE_RENDER_ZOOM = 16
+
+
+def pixel_size(zoom):
+    """Approximate width of one 256px web-mercator tile pixel at ``zoom``, in degrees."""
+    return 360.0 / (256 * 2 ** zoom)
+
+
+def tolerance(zoom):
+    # Half a pixel: anything smaller is invisible at this zoom
+    return pixel_size(zoom) / 2
+
+
+def precision(zoom):
+    """Decimal places needed to keep coordinates within a tenth of a pixel."""
+    return max(0, math.ceil(-math.log10(pixel_size(zoom) / 10)))
+
+
+def quantize(geoms, decimals):
+    """Round every coordinate so the serialized GeoJSON carries no spurious digits."""
+    return shapely.transform(geoms, lambda coords: np.round(coords, decimals))
+
+
+def simplify_boundaries(geoms, zoom):
+    """Simplify polygons for ``zoom``, keeping shared constituency edges aligned.
+
+    Uses GEOS coverage simplification when available (shapely >= 2.1), which
+    simplifies each shared edge once for both neighbours; older versions
+    fall back to per-polygon topology-preserving Douglas-Peucker.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    if hasattr(shapely, 'coverage_simplify'):
+        try:
+            simplified = shapely.coverage_simplify(geoms, tolerance(zoom))
+        except shapely.errors.GEOSException:
+            simplified = shapely.simplify(geoms, tolerance(zoom), preserve_topology=True)
+    else:
+        simplified = shapely.simplify(geoms, tolerance(zoom), preserve_topology=True)
+    return quantize(simplified, precision(zoom))
+
+
+def simplify_route(coords, zoom=ROUTE_RENDER_ZOOM):
+    """Douglas-Peucker thinning of a [lat, lon] route for display at ``zoom``."""
+    if len(coords) < 3:
+        return [list(c) for c in coords]
+    line = LineString([(lon, lat) for lat, lon in coords]).simplify(tolerance(zoom), preserve_topology=False)
+    xy = np.round(np.asarray(line.coords), precision(zoom))
+    return xy[:, ::-1].tolist()
+
+
+def encode_polyline(coords, decimals=5):
+    """Encode [lat, lon] pairs with the Google encoded polyline algorithm."""
+    if len(coords) == 0:
+        return ''
+    scaled = np.round(np.asarray(coords, dtype=float) * 10 ** decimals).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+
+    # Zig-zag encode the signed deltas, then emit 5-bit chunks
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    chunks = []
+    for value in values.tolist():
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+def decode_polyline(encoded, decimals=5):
+    """Inverse of :func:`encode_polyline`."""
+    values, value, shift = [], 0, 0
+    for char in encoded:
+        b = ord(char) - 63
+        value |= (b & 0x1f) << shift
+        shift += 5
+        if b < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    coords = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0)
+    return (coords / 10 ** decimals).tolist()
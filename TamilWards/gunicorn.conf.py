@@ -0,0 +1,33 @@
+import os
+import multiprocessing
+
+# Relative paths in the app ('../public', the datasets) resolve from this directory
+chdir = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count()))
+# Threads per worker. 1 keeps the sync worker, where ``timeout`` bounds every request; >1 switches
+# to the gthread worker, where ``timeout`` is only a liveness heartbeat and a hung request is never cut off
+threads = int(os.environ.get('WEB_THREADS', 1))
+
+# Sync worker: seconds a worker may spend on one request before it is killed and replaced.
+# gthread worker: seconds without a heartbeat from the worker process as a whole
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', 5))
+
+# Recycle workers now and then to bound memory growth from caches
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+# Load the datasets and indexes once in the master (see wsgi.py) and share them with workers
+preload_app = True
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-')
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # One janitor for the whole server, in the master, rather than one per worker
+    from artifacts import start_janitor
+    start_janitor(os.path.join(chdir, '..', 'public'))
@@ -0,0 +1,76 @@
+"""On-disk cache of the pages the crawler downloads, for conditional re-fetches and offline replay.
+
+One SQLite row per URL holds the last 200 body with its ETag and
+Last-Modified validators. The crawler serves a row as-is while it is fresh
+(CRAWL_CACHE_TTL seconds, per host via CRAWL_FRESHNESS) and revalidates it
+with If-None-Match / If-Modified-Since afterwards, so an unchanged page costs
+a 304 instead of a download. With CRAWL_OFFLINE=1 the crawler answers from
+the cache only, which replays a recorded run without any network.
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+from datastore import BASE_DIR
+
+CACHE_FILE = os.environ.get('CRAWL_CACHE_FILE', os.path.join(BASE_DIR, 'cache', 'http.sqlite3')) or None
+CACHE_TTL = float(os.environ.get('CRAWL_CACHE_TTL', 6 * 3600))
+OFFLINE = os.environ.get('CRAWL_OFFLINE', '0').lower() in ('1', 'true', 'yes')
+
+CachedPage = namedtuple('CachedPage', 'body etag last_modified fetched_at')
+
+
+class HttpCache:
+    """Thread-safe SQLite store of page bodies and validators, keyed by URL.
+
+    ``freshness`` maps a host to its TTL in seconds, overriding ``ttl``.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL, freshness=None):
+        self.path = path
+        self.ttl = ttl
+        self.freshness = freshness or {}
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            # WAL: readers don't wait for the writer
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, fetched_at REAL, "
+                       "etag TEXT, last_modified TEXT, body BLOB)")
+
+    def _connect(self):
+        # One connection per thread, reused across calls
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10)
+        return db
+
+    def is_fresh(self, page, host):
+        return time.time() - page.fetched_at < self.freshness.get(host, self.ttl)
+
+    def get(self, url):
+        with self._connect() as db:
+            row = db.execute("SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                             (url,)).fetchone()
+        return CachedPage(*row) if row is not None else None
+
+    def put(self, url, body, etag=None, last_modified=None):
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                       (url, time.time(), etag, last_modified, body))
+
+    def touch(self, url):
+        """Restart the freshness of ``url`` after a 304"""
+        with self._connect() as db:
+            db.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def conditional_headers(self, page):
+        """If-None-Match / If-Modified-Since for revalidating ``page``"""
+        headers = {}
+        if page is not None and page.etag:
+            headers['If-None-Match'] = page.etag
+        if page is not None and page.last_modified:
+            headers['If-Modified-Since'] = page.last_modified
+        return headers
@@ -0,0 +1,74 @@
+"""Small closed-loop load generator for the route API.
+
+    python loadtest.py --url http://127.0.0.1:5001 --concurrency 16 --requests 400
+
+Each worker thread sends requests back to back, cycling through a few place
+pairs; latency percentiles and throughput are printed at the end.
+"""
+import time
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+PAIRS = [
+    ('Chennai', 'Madurai'),
+    ('Coimbatore', 'Salem'),
+    ('Tiruchirappalli', 'Tirunelveli'),
+    ('Vellore', 'Erode'),
+    ('Thanjavur', 'Kanniyakumari'),
+]
+
+
+def run(url, endpoint, total, concurrency, params):
+    pairs = itertools.cycle(PAIRS)
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def one(_):
+        origin, destination = next(pairs)
+        start = time.perf_counter()
+        try:
+            response = session.get(f"{url}{endpoint}", params=dict(params, **{'from': origin, 'to': destination}),
+                                   timeout=120)
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        return time.perf_counter() - start, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    errors = sum(1 for _, status in results if status != 200)
+    print(f"{endpoint}: {total} requests, concurrency {concurrency}, {elapsed:.1f}s")
+    print(f"  throughput: {total / elapsed:.1f} req/s, errors: {errors}")
+    for p in (50, 90, 99):
+        print(f"  p{p}: {np.percentile(latencies, p):.0f} ms")
+    print(f"  max: {latencies.max():.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5001')
+    parser.add_argument('--endpoint', default='/generate_route')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mode', default='car')
+    parser.add_argument('--render', action='store_true', help='also render the folium map')
+    args = parser.parse_args()
+
+    params = {'mode': args.mode}
+    if args.render:
+        params['render'] = 'true'
+    run(args.url.rstrip('/'), args.endpoint, args.requests, args.concurrency, params)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import os
+import json
+import heapq
+
+import numpy as np
+
+from datastore import EXCEL_FILE, store
+
+EARTH_RADIUS_M = 6371008.8
+
+# Straight-line to road distance correction for centroid graphs
+DETOUR_FACTOR = 1.3
+NEIGHBOURS = int(os.environ.get('LOCAL_GRAPH_NEIGHBOURS', 6))
+LOCAL_GRAPH_FILE = os.environ.get('LOCAL_GRAPH_FILE') or None
+
+# Average speeds (metres per second) used to estimate durations
+PROFILE_SPEEDS = {'driving': 50 / 3.6, 'bicycle': 15 / 3.6, 'foot': 5 / 3.6}
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres; accepts scalars or NumPy arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class GraphRouter:
+    """In-process A* router over a weighted node graph (edge weights in metres).
+
+    Origin and destination are snapped to their nearest nodes, so routes work
+    offline with predictable latency. Only a single route is produced;
+    ``alternatives`` is accepted for interface compatibility with OSRM.
+    """
+
+    def __init__(self, nodes, edges):
+        self.nodes = np.asarray(nodes, dtype=float)
+        self.adjacency = [[] for _ in range(len(self.nodes))]
+        for i, j, weight in edges:
+            self.adjacency[int(i)].append((int(j), float(weight)))
+            self.adjacency[int(j)].append((int(i), float(weight)))
+
+    @classmethod
+    def from_centroids(cls, lats, lons, k=NEIGHBOURS):
+        """Connect every centroid to its ``k`` nearest neighbours, then join stray components."""
+        nodes = np.column_stack([lats, lons]).astype(float)
+        dist = haversine(nodes[:, None, 0], nodes[:, None, 1], nodes[None, :, 0], nodes[None, :, 1])
+        np.fill_diagonal(dist, np.inf)
+
+        k = min(k, len(nodes) - 1)
+        nearest = np.argsort(dist, axis=1)[:, :k]
+        edges = {(min(i, j), max(i, j)) for i in range(len(nodes)) for j in nearest[i]}
+
+        # Link each disconnected component to the closest node outside it
+        router = cls(nodes, [(i, j, dist[i, j] * DETOUR_FACTOR) for i, j in edges])
+        labels = router.components()
+        while labels.max() > 0:
+            inside = labels == 0
+            sub = dist[np.ix_(inside, ~inside)]
+            a, b = np.unravel_index(np.argmin(sub), sub.shape)
+            i, j = np.flatnonzero(inside)[a], np.flatnonzero(~inside)[b]
+            edges.add((min(i, j), max(i, j)))
+            router = cls(nodes, [(i, j, dist[i, j] * DETOUR_FACTOR) for i, j in edges])
+            labels = router.components()
+        return router
+
+    @classmethod
+    def from_file(cls, path):
+        """Load ``{"nodes": [[lat, lon], ...], "edges": [[i, j, metres], ...]}``."""
+        with open(path, 'r', encoding='utf-8') as f:
+            graph = json.load(f)
+        return cls(graph['nodes'], graph['edges'])
+
+    def components(self):
+        labels = np.full(len(self.nodes), -1)
+        label = 0
+        for start in range(len(self.nodes)):
+            if labels[start] >= 0:
+                continue
+            stack = [start]
+            labels[start] = label
+            while stack:
+                node = stack.pop()
+                for nxt, _ in self.adjacency[node]:
+                    if labels[nxt] < 0:
+                        labels[nxt] = label
+                        stack.append(nxt)
+            label += 1
+        return labels
+
+    def nearest_node(self, lat, lon):
+        return int(np.argmin(haversine(lat, lon, self.nodes[:, 0], self.nodes[:, 1])))
+
+    def shortest_path(self, source, target):
+        """A* with a great-circle heuristic; returns (node list, metres)."""
+        goal = self.nodes[target]
+        heuristic = haversine(self.nodes[:, 0], self.nodes[:, 1], goal[0], goal[1])
+        best = {source: 0.0}
+        previous = {}
+        queue = [(heuristic[source], 0.0, source)]
+        while queue:
+            _, cost, node = heapq.heappop(queue)
+            if node == target:
+                break
+            if cost > best.get(node, np.inf):
+                continue
+            for nxt, weight in self.adjacency[node]:
+                new_cost = cost + weight
+                if new_cost < best.get(nxt, np.inf):
+                    best[nxt] = new_cost
+                    previous[nxt] = node
+                    heapq.heappush(queue, (new_cost + heuristic[nxt], new_cost, nxt))
+
+        if target not in best:
+            raise ValueError("No path between the requested points in the local graph")
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        return path[::-1], best[target]
+
+    def routes(self, lat1, lon1, lat2, lon2, profile='driving', alternatives=False):
+        source, target = self.nearest_node(lat1, lon1), self.nearest_node(lat2, lon2)
+        path, distance = self.shortest_path(source, target)
+        coords = self.nodes[path].tolist()
+        # The exact endpoints, unless they are the snapped nodes themselves (no zero-length legs)
+        if [float(lat1), float(lon1)] != coords[0]:
+            coords.insert(0, [float(lat1), float(lon1)])
+        if [float(lat2), float(lon2)] != coords[-1]:
+            coords.append([float(lat2), float(lon2)])
+
+        # Add the legs from the exact endpoints to their snapped nodes
+        distance += float(haversine(lat1, lon1, *self.nodes[source]) + haversine(lat2, lon2, *self.nodes[target]))
+        speed = PROFILE_SPEEDS.get(profile, PROFILE_SPEEDS['driving'])
+        return [{'coords': coords, 'distance': distance, 'duration': distance / speed}]
+
+    def route(self, lat1, lon1, lat2, lon2, profile='driving'):
+        return self.routes(lat1, lon1, lat2, lon2, profile)[0]
+
+
+def _build_router():
+    if LOCAL_GRAPH_FILE:
+        return GraphRouter.from_file(LOCAL_GRAPH_FILE)
+    df = store.read_excel(EXCEL_FILE).dropna(subset=['Latitude', 'Longitude'])
+    return GraphRouter.from_centroids(df['Latitude'].to_numpy(), df['Longitude'].to_numpy())
+
+
+def get_local_router():
+    return store.derived('local_router', [EXCEL_FILE], _build_router)
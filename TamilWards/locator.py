@@ -0,0 +1,43 @@
+import numpy as np
+
+from route_analysis import SAFETY_COLUMNS, get_ward_safety
+from spatial_index import get_ward_index
+from zones import get_ward_zones
+
+# Attributes returned for every located point, all aligned with the ward positions
+LOCATE_COLUMNS = ['DIST_NAME', 'AC_NAME'] + SAFETY_COLUMNS
+
+
+def locate_many(lats, lons):
+    """Constituency and safety data for each (lat, lon); None for points outside every polygon.
+
+    ``lats``/``lons`` are equal-length sequences or arrays; the lookup is one
+    vectorized point-in-polygon query over the ward STRtree.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if lats.shape != lons.shape:
+        raise ValueError("lat and lon must have the same length")
+
+    positions = get_ward_index().locate(lats, lons)
+    found = positions >= 0
+    hits = positions[found]
+
+    safety = get_ward_safety()
+    zones = get_ward_zones()
+    columns = {'id': hits.tolist()}
+    for name in LOCATE_COLUMNS:
+        values = safety[name].to_numpy()[hits]
+        columns[name] = [None if v != v else v for v in values.tolist()]  # NaN -> None
+    for name in ('Zone', 'Zone_Color'):
+        columns[name] = [v if isinstance(v, str) else None for v in zones[name].to_numpy()[hits].tolist()]
+
+    matches = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    results = [None] * len(positions)
+    for i, match in zip(np.flatnonzero(found).tolist(), matches):
+        results[i] = match
+    return results
+
+
+def locate(lat, lon):
+    return locate_many([lat], [lon])[0]
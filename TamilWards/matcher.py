@@ -0,0 +1,66 @@
+"""Find which of a fixed set of patterns occur in a text with one scan.
+
+The patterns are merged into a trie and the trie is written out as a single
+regular expression, e.g. ``salem``, ``salem west`` and ``sattur`` become
+``sa(?:lem(?: west)?|ttur)``. At each position the regex engine then follows
+one branch of the trie instead of trying every pattern in turn, which is the
+Aho-Corasick idea carried out by ``re`` in C.
+
+The regex sits in a lookahead so that it is tried at every position of the
+text, overlapping matches included, and returns the longest pattern
+starting there. Every shorter pattern that starts at the same position is a
+prefix of that one, so each match also counts the patterns that are its
+prefixes. The result is exactly the set of patterns ``p`` with ``p in text``.
+"""
+import re
+from functools import lru_cache
+
+
+def _trie(patterns):
+    root = {}
+    for pattern in patterns:
+        node = root
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    return root
+
+
+def _trie_regex(node):
+    terminal = '' in node
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    # Greedy: the longer pattern is tried first, the one ending here on backtrack
+    return f"(?:{body})?" if terminal else body
+
+
+class MultiMatcher:
+    """Set of the patterns occurring in a text; matching is case-sensitive, so
+    pass lowercased patterns and text for case-insensitive matching."""
+
+    def __init__(self, patterns):
+        self.patterns = frozenset(p for p in patterns if p)
+        self._any = re.compile(_trie_regex(_trie(self.patterns))) if self.patterns else None
+        self._all = re.compile(f"(?=({self._any.pattern}))") if self.patterns else None
+        self._prefixes = {p: frozenset(q for q in self.patterns if p.startswith(q)) for p in self.patterns}
+
+    def find(self, text):
+        """All patterns that occur in ``text``"""
+        found = set()
+        if self._all is None:
+            return found
+        for match in self._all.finditer(text):
+            found |= self._prefixes[match.group(1)]
+        return found
+
+    def any(self, text):
+        """Whether any pattern occurs in ``text``"""
+        return self._any is not None and self._any.search(text) is not None
+
+
+@lru_cache(maxsize=64)
+def matcher_for(patterns):
+    """Compiled MultiMatcher for a tuple of patterns, reused across calls"""
+    return MultiMatcher(patterns)
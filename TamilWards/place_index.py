@@ -0,0 +1,170 @@
+import re
+
+import pandas as pd
+
+from datastore import EXCEL_FILE, store
+
+NGRAM = 3
+MAX_PREFIX = 12
+
+# Match kinds, best first, with their base confidence
+EXACT, PREFIX, SUBSTRING = 0, 1, 2
+BASE_CONFIDENCE = {EXACT: 1.0, PREFIX: 0.7, SUBSTRING: 0.4}
+
+# Which column a key came from; constituencies rank ahead of districts
+AC, AC_NORM, DIST = 0, 1, 2
+
+
+def remove_sc_suffix(name):
+    return re.sub(r"\s*\(.*?\)", "", name).strip()
+
+
+def normalize_query(text):
+    return " ".join(str(text).lower().split())
+
+
+def _ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class PlaceIndex:
+    """Lookup tables over AC_NAME / DIST_NAME mapping names to row coordinates.
+
+    Built once per dataset version. Every distinct lowercased name (raw AC
+    name, AC name without the (SC)/(ST) suffix, district name) becomes a key
+    pointing at the first row that carries it, and is reachable by exact
+    match, by prefix, or by substring through an n-gram posting list.
+    """
+
+    def __init__(self, df):
+        df = df.dropna(subset=['Latitude', 'Longitude'])
+        self.lat = df['Latitude'].astype(float).tolist()
+        self.lon = df['Longitude'].astype(float).tolist()
+        self.dist = df['DIST_NAME'].tolist()
+        self.ac = df['AC_NAME'].tolist()
+
+        self.keys = []       # key id -> (text, row, column)
+        self.exact = {}      # text -> [key ids]
+        self.prefix = {}     # prefix -> [key ids]
+        self.grams = {}      # n-gram -> set of key ids
+        seen = set()
+
+        def add(text, row, column):
+            if not isinstance(text, str) or not text or (text, column) in seen:
+                return
+            seen.add((text, column))
+            key_id = len(self.keys)
+            self.keys.append((text, row, column))
+            self.exact.setdefault(text, []).append(key_id)
+            for n in range(1, min(len(text), MAX_PREFIX) + 1):
+                self.prefix.setdefault(text[:n], []).append(key_id)
+            for gram in _ngrams(text):
+                self.grams.setdefault(gram, set()).add(key_id)
+
+        ac_lower = [normalize_query(a) if isinstance(a, str) else None for a in self.ac]
+        dist_lower = [normalize_query(d) if isinstance(d, str) else None for d in self.dist]
+        for row, name in enumerate(ac_lower):
+            add(name, row, AC)
+        for row, name in enumerate(ac_lower):
+            if name:
+                add(remove_sc_suffix(name), row, AC_NORM)
+        for row, name in enumerate(dist_lower):
+            add(name, row, DIST)
+
+        # Row of the best exact key per name, ranked as in search()
+        self.exact_row = {}
+        for text, ids in self.exact.items():
+            _, row, _ = min((self.keys[k] for k in ids), key=lambda key: (key[2], key[1]))
+            self.exact_row[text] = row
+
+    def _substring_keys(self, query):
+        if len(query) < NGRAM:
+            return [k for k, (text, _, _) in enumerate(self.keys) if query in text]
+        postings = [self.grams.get(gram) for gram in _ngrams(query)]
+        if not all(postings):
+            return []
+        postings.sort(key=len)
+        candidates = set.intersection(*postings)
+        return [k for k in candidates if query in self.keys[k][0]]
+
+    def lookup(self, query):
+        """Return ``{key id: match kind}`` for every key matching ``query``."""
+        matches = {}
+        for key_id in self.exact.get(query, ()):
+            matches[key_id] = EXACT
+        if len(query) <= MAX_PREFIX:
+            prefixed = self.prefix.get(query, ())
+        else:
+            prefixed = [k for k in self.prefix.get(query[:MAX_PREFIX], ()) if self.keys[k][0].startswith(query)]
+        for key_id in prefixed:
+            matches.setdefault(key_id, PREFIX)
+        for key_id in self._substring_keys(query):
+            matches.setdefault(key_id, SUBSTRING)
+        return matches
+
+    def candidate(self, row, kind, coverage):
+        confidence = BASE_CONFIDENCE[kind]
+        if kind != EXACT:
+            confidence += 0.3 * coverage
+        return {
+            'lat': self.lat[row],
+            'lng': self.lon[row],
+            'district': self.dist[row],
+            'constituency': self.ac[row],
+            'name': remove_sc_suffix(self.ac[row]) if isinstance(self.ac[row], str) else self.dist[row],
+            'match': ('exact', 'prefix', 'substring')[kind],
+            'confidence': round(confidence, 3),
+        }
+
+    def search(self, query, limit=10):
+        """Ranked candidate rows for ``query``: exact, then prefix, then substring matches."""
+        query = normalize_query(query)
+        if not query:
+            return []
+
+        ranked = []
+        for key_id, kind in self.lookup(query).items():
+            text, row, column = self.keys[key_id]
+            ranked.append((kind, column, -len(query) / len(text), row, key_id))
+        ranked.sort()
+
+        results = []
+        seen_rows = set()
+        for kind, column, neg_coverage, row, key_id in ranked:
+            if row in seen_rows:
+                continue
+            seen_rows.add(row)
+            results.append(self.candidate(row, kind, -neg_coverage))
+            if len(results) >= limit:
+                break
+        return results
+
+    def best(self, query):
+        results = self.search(query, limit=1)
+        return results[0] if results else None
+
+    def resolve_many(self, places):
+        """Best candidate (or None) for each of ``places``, in input order.
+
+        Queries are normalized column-wise, duplicates collapse to one lookup,
+        and exact names are resolved with a single ``Series.map`` so only the
+        remaining fuzzy queries go through ``search``.
+        """
+        queries = pd.Series(list(places), dtype=object).fillna('').astype(str)
+        queries = queries.str.lower().str.split().str.join(' ')
+        unique = pd.Series(queries.unique())
+
+        rows = unique.map(self.exact_row)
+
+        resolved = {}
+        for query, row in zip(unique, rows):
+            if pd.notna(row):
+                resolved[query] = self.candidate(int(row), EXACT, 1.0)
+            else:
+                resolved[query] = self.best(query) if query else None
+        return [resolved[q] for q in queries]
+
+
+def get_place_index(excel_file=EXCEL_FILE):
+    return store.derived(('place_index', excel_file), [excel_file],
+                         lambda: PlaceIndex(store.read_excel(excel_file)))
@@ -1,15 +1,15 @@
-import pandas as pd
-import geopandas as gpd
 import folium
 from shapely.geometry import LineString
 import requests
 import re
+from datastore import get_safety_data, get_wards
+from zones import get_zones
 
 def remove_sc_suffix(name):
     return re.sub(r"\s*\(.*?\)", "", name).strip()
 
 def get_location_fuzzy(place, excel_file):
-    df = pd.read_excel(excel_file)
+    df = get_safety_data(excel_file)
     place_lower = place.strip().lower()
     # Prepare candidate names
     names = df['AC_NAME'].dropna().str.lower().tolist() + df['DIST_NAME'].dropna().str.lower().tolist()
@@ -34,29 +34,6 @@ def get_route_osrm(lat1, lon1, lat2, lon2, profile='driving'):
     else:
         return [[lat1, lon1], [lat2, lon2]]
 
-def categorize_zones(df):
-    q1 = df['Total_Crime_Count'].quantile(0.25)
-    q2 = df['Total_Crime_Count'].quantile(0.5)
-    q3 = df['Total_Crime_Count'].quantile(0.75)
-    
-    def zone_authoritative(count):
-        if count <= q1:
-            return 'Safe Zone'
-        elif count <= q2:
-            return 'Moderate Zone'
-        else:
-            return 'Risky Zone'
-            
-    df['Zone'] = df['Total_Crime_Count'].apply(zone_authoritative)
-    
-    color_map = {
-        'Safe Zone': '#FFFF00',      # Yellow
-        'Moderate Zone': '#FFA500',  # Orange
-        'Risky Zone': '#FF0000'      # Red
-    }
-    df['Zone_Color'] = df['Zone'].map(color_map).fillna('#FFFFFF')
-    return df
-
 def generate_map(from_place, to_place, mode='car'):
     # Adjust paths as needed (assuming files in same dir)
     excel_file = 'tn_enhanced_safety_analysis_20250915_122616.xlsx'
@@ -78,11 +55,8 @@ def generate_map(from_place, to_place, mode='car'):
         return "<html><body><h1>One or both places not found in the data. Please try again.</h1></body></html>"
 
     # Load GeoJSON and Excel
-    wards = gpd.read_file(geojson_file)
-    df = pd.read_excel(excel_file)
-    df = categorize_zones(df)
-
-    wards = wards.merge(df[['DIST_NAME', 'AC_NAME', 'Zone', 'Zone_Color']], on=['DIST_NAME', 'AC_NAME'], how='left')
+    wards = get_wards(geojson_file)
+    wards = wards.merge(get_zones(excel_file=excel_file), on=['DIST_NAME', 'AC_NAME'], how='left')
 
     # Get route line
     route_coords = get_route_osrm(from_lat, from_lon, to_lat, to_lon, profile)
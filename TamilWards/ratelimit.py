@@ -0,0 +1,123 @@
+"""Per-host request pacing for the crawler: token buckets, backoff and circuit breakers.
+
+All of these are meant for coroutines on one event loop and are not thread-safe.
+"""
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """``rate`` requests per second on average, bursts of up to ``burst``.
+
+    ``slow_down`` halves the rate (down to ``min_fraction`` of the configured
+    one) when the host says we are too fast; ``recover`` wins it back a little
+    with every success. ``pause`` holds all requests until a point in time,
+    for a host that asked us to come back later. A rate <= 0 means unlimited.
+    """
+
+    def __init__(self, rate, burst, min_fraction=0.1):
+        self.max_rate = self.rate = rate
+        self.min_rate = rate * min_fraction
+        self.burst = max(1, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            # No burst of saved-up tokens when the pause ends
+            self.tokens = 0.0
+            self.updated = until
+
+    def slow_down(self):
+        if self.rate > 0:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self):
+        if 0 < self.rate < self.max_rate:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class CircuitBreaker:
+    """Stop calling a host after ``threshold`` consecutive failures.
+
+    While open, ``allow`` refuses for ``cooldown`` seconds; after that one
+    probe request is let through (half-open), and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.cooldown:
+            return False
+        # One probe per cooldown; a probe that never reports back just waits for the next one
+        self.opened_at = now
+        self.probing = True
+        return True
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+
+def backoff_delay(attempt, base, cap):
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after_seconds(value, cap):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(cap, float(value))
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(cap, max(0.0, when.timestamp() - time.time()))
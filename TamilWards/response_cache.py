@@ -0,0 +1,136 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+from atomic import atomic_write
+from datastore import BASE_DIR
+
+RESPONSE_CACHE_BYTES = int(os.environ.get('RESPONSE_CACHE_BYTES', 64 * 1024 * 1024))
+RESPONSE_CACHE_DIR = os.environ.get('RESPONSE_CACHE_DIR', os.path.join(BASE_DIR, 'cache', 'responses'))
+RESPONSE_CACHE_DISK_BYTES = int(os.environ.get('RESPONSE_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+
+# Re-scan the cache directory for the size cap every this many disk writes
+DISK_SWEEP_EVERY = 32
+
+CachedResponse = namedtuple('CachedResponse', 'body content_type etag')
+
+
+def make_entry(body, content_type='application/json'):
+    """CachedResponse for ``body`` without storing it."""
+    return CachedResponse(body, content_type, hashlib.sha1(body).hexdigest())
+
+
+def json_body(obj):
+    """JSON bytes for a cached response body.
+
+    Every server filling the cache must encode the same object to the same
+    bytes, or the ETag of one resource changes with whichever server built it.
+    Matches Flask's default provider (sorted keys, ASCII).
+    """
+    return json.dumps(obj, sort_keys=True).encode()
+
+
+def cache_key(*parts):
+    """Stable hex key for any JSON-serializable key parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Byte-bounded LRU of response bodies, backed by a size-capped directory.
+
+    Disk entries are ``<key>.bin`` files holding a JSON header line followed by
+    the body; a file's mtime is its last use, which drives disk eviction.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_BYTES, directory=RESPONSE_CACHE_DIR,
+                 max_disk_bytes=RESPONSE_CACHE_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory or None
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        entry = CachedResponse(body, header['content_type'], header['etag'])
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, body, content_type='application/json'):
+        entry = make_entry(body, content_type)
+        self._remember(key, entry)
+        if self.directory:
+            self._write(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = entry
+            self._size += len(entry.body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+    def _write(self, key, entry):
+        header = json.dumps({'content_type': entry.content_type, 'etag': entry.etag}).encode()
+        atomic_write(self._path(key), header + b'\n' + entry.body)
+
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % DISK_SWEEP_EVERY == 0
+        if sweep:
+            self.sweep_disk()
+
+    def sweep_disk(self):
+        """Delete least recently used files until the directory fits ``max_disk_bytes``."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.bin'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,132 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import shapely
+
+from datastore import EXCEL_FILE, GEOJSON_FILE, store
+from local_routing import haversine
+from spatial_index import get_ward_index
+
+SAFETY_COLUMNS = ['Safety_Score', 'Total_Crime_Count']
+
+# Shared pool for scoring alternative routes; shapely releases the GIL in its vectorized ops
+SCORING_THREADS = int(os.environ.get('ROUTE_SCORING_THREADS', 4))
+_scoring_pool = ThreadPoolExecutor(max_workers=SCORING_THREADS)
+
+
+def _build_ward_safety():
+    wards = store.read_geojson(GEOJSON_FILE)
+    df = store.read_excel(EXCEL_FILE).drop_duplicates(['DIST_NAME', 'AC_NAME'])
+    # Left merge on unique keys keeps one row per polygon, in polygon order
+    return wards[['DIST_NAME', 'AC_NAME']].merge(
+        df[['DIST_NAME', 'AC_NAME'] + SAFETY_COLUMNS], on=['DIST_NAME', 'AC_NAME'], how='left')
+
+
+def get_ward_safety():
+    """Safety attributes positionally aligned with the ward polygons / WardIndex."""
+    return store.derived('ward_safety', [GEOJSON_FILE, EXCEL_FILE], _build_ward_safety)
+
+
+def segment_lengths(coords):
+    """Haversine length in metres of each consecutive [lat, lon] pair."""
+    coords = np.asarray(coords, dtype=float)
+    return haversine(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+
+
+def constituency_lengths(coords, index=None):
+    """Metres of route inside each ward polygon, plus the first segment touching it.
+
+    Every route segment is overlaid on the polygons in one STRtree query
+    and one vectorized intersection; each clipped piece gets its share of
+    the segment's haversine length.
+    """
+    index = index or get_ward_index()
+    coords = np.asarray(coords, dtype=float)
+    lengths = np.zeros(len(index))
+    first_seen = np.full(len(index), np.iinfo(np.int64).max)
+    if len(coords) < 2:
+        return lengths, first_seen
+
+    xy = coords[:, ::-1]
+    segments = shapely.linestrings(np.stack([xy[:-1], xy[1:]], axis=1))
+    seg_idx, ward_idx = index.tree.query(segments, predicate='intersects')
+    if len(seg_idx) == 0:
+        return lengths, first_seen
+
+    seg_deg = shapely.length(segments[seg_idx])
+    piece_deg = shapely.length(shapely.intersection(segments[seg_idx], index.geoms[ward_idx]))
+    share = np.divide(piece_deg, seg_deg, out=np.zeros_like(piece_deg), where=seg_deg > 0)
+
+    np.add.at(lengths, ward_idx, share * segment_lengths(coords)[seg_idx])
+    np.minimum.at(first_seen, ward_idx, seg_idx)
+    return lengths, first_seen
+
+
+def analyze_route(coords):
+    """Distance, per-constituency lengths and length-weighted safety exposure of a route.
+
+    Risk per constituency is ``1 - Safety_Score``; ``risk_score`` and
+    ``crime_exposure`` are averages weighted by the kilometres driven through
+    each constituency with data, ``risk_km`` is the risk integrated over the
+    route.
+    """
+    coords = np.asarray(coords, dtype=float)
+    distance_m = float(segment_lengths(coords).sum()) if len(coords) > 1 else 0.0
+
+    lengths, first_seen = constituency_lengths(coords)
+    safety = get_ward_safety()
+    hit = np.flatnonzero(lengths > 0)
+    hit = hit[np.argsort(first_seen[hit], kind='stable')]
+    if distance_m == 0 and len(coords):
+        # Origin equals destination: no length anywhere, but the point still lies in a ward
+        ward = get_ward_index().locate(coords[:1, 0], coords[:1, 1])[0]
+        hit = np.array([ward] if ward >= 0 else [], dtype=np.int64)
+
+    km = lengths[hit] / 1000
+    score = safety['Safety_Score'].to_numpy(dtype=float)[hit]
+    crimes = safety['Total_Crime_Count'].to_numpy(dtype=float)[hit]
+    known = ~np.isnan(score)
+    covered_km = float(km[known].sum())
+    risk_km = float((km[known] * (1 - score[known])).sum())
+    crime_km = float((km[known] * crimes[known]).sum())
+
+    constituencies = [{
+        'id': int(ward),
+        'AC_NAME': ac,
+        'DIST_NAME': dist,
+        'length_km': round(float(length), 3),
+        'Safety_Score': None if np.isnan(s) else float(s),
+        'Total_Crime_Count': None if np.isnan(c) else int(c),
+    } for ward, ac, dist, length, s, c in zip(hit, safety['AC_NAME'].to_numpy()[hit],
+                                              safety['DIST_NAME'].to_numpy()[hit], km, score, crimes)]
+
+    return {
+        'distance_km': round(distance_m / 1000, 3),
+        'constituencies': constituencies,
+        'exposure': {
+            'covered_km': round(covered_km, 3),
+            'risk_km': round(risk_km, 3),
+            'risk_score': round(risk_km / covered_km, 4) if covered_km else None,
+            'crime_exposure': round(crime_km / covered_km, 3) if covered_km else None,
+        },
+    }
+
+
+def rank_routes(routes):
+    """Score candidate routes concurrently and order them safest first.
+
+    Routes are ranked by ``risk_km`` (risk integrated over distance, so a
+    long detour through safe areas can still lose to a short one), then by
+    distance. Each route dict gains ``analysis``, ``rank`` and
+    ``extra_distance_km`` relative to the shortest candidate.
+    """
+    analyses = list(_scoring_pool.map(lambda route: analyze_route(route['coords']), routes))
+    shortest = min(a['distance_km'] for a in analyses)
+
+    scored = [dict(route, analysis=analysis, extra_distance_km=round(analysis['distance_km'] - shortest, 3))
+              for route, analysis in zip(routes, analyses)]
+    scored.sort(key=lambda r: (r['analysis']['exposure']['risk_km'], r['analysis']['distance_km']))
+    for rank, route in enumerate(scored, 1):
+        route['rank'] = rank
+    return scored
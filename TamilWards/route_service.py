@@ -0,0 +1,239 @@
+import json
+
+from artifacts import save_map_html
+from base_layer import ON_ROUTE_STYLE, get_base_layer
+from datastore import dataset_version, preload
+from generate_map import generate_map, get_routes, PROFILE_MAP
+from geometry_export import encode_polyline, simplify_route
+from local_routing import get_local_router
+from place_index import get_place_index
+from response_cache import cache_key
+from route_analysis import analyze_route, get_ward_safety, rank_routes
+from routing import ROUTING_PROVIDER
+from spatial_index import get_ward_index
+from zones import check_scheme, scheme_signature
+
+STRATEGIES = ('fastest', 'safest')
+ENCODINGS = ('coords', 'polyline')
+FORMATS = ('json', 'geojson')
+# Deepest web-map zoom accepted for ?simplify=
+MAX_ZOOM = 22
+
+# Alternatives requested from the router for strategy=safest
+SAFEST_ALTERNATIVES = 3
+
+
+class PlaceNotFound(LookupError):
+    pass
+
+
+def resolve_place(place):
+    match = get_place_index().best(place)
+    if match is None:
+        raise PlaceNotFound("One or both places not found in the data")
+    return dict(match, address=place)
+
+
+def warm():
+    """Build every per-dataset structure a request can touch.
+
+    Checks the zone configuration first, so a bad ZONE_SCHEME/ZONE_THRESHOLDS
+    stops the server at startup instead of failing its first request.
+    """
+    check_scheme()
+    preload()
+    get_place_index()
+    get_ward_index()
+    get_ward_safety()
+    get_base_layer()
+    if ROUTING_PROVIDER != 'osrm':
+        get_local_router()
+
+
+def parse_route_args(args):
+    """Validated /generate_route query parameters; raises ValueError with a client-facing message."""
+    zoom = None
+    if args.get('simplify'):
+        try:
+            zoom = int(args['simplify'])
+        except ValueError:
+            zoom = None
+        if zoom is None or not 0 <= zoom <= MAX_ZOOM:
+            raise ValueError(f"'simplify' must be a zoom level from 0 to {MAX_ZOOM}")
+    params = {
+        'from_place': args.get('from'),
+        'to_place': args.get('to'),
+        'mode': args.get('mode', 'car'),
+        'strategy': args.get('strategy', 'fastest'),
+        'render': args.get('render', 'false').lower() in ('1', 'true', 'yes'),
+        'fmt': args.get('format', 'json'),
+        'encoding': args.get('encoding', 'coords'),
+        'zoom': zoom,
+    }
+    if not params['from_place'] or not params['to_place']:
+        raise ValueError("Missing 'from' or 'to' parameters")
+    if params['strategy'] not in STRATEGIES:
+        raise ValueError("'strategy' must be 'fastest' or 'safest'")
+    if params['fmt'] not in FORMATS:
+        raise ValueError("'format' must be 'json' or 'geojson'")
+    if params['encoding'] not in ENCODINGS:
+        raise ValueError("'encoding' must be 'coords' or 'polyline'")
+    if params['fmt'] == 'geojson' and params['encoding'] != 'coords':
+        raise ValueError("'format=geojson' carries plain coordinates; drop 'encoding'")
+    return params
+
+
+def resolved_key(endpoint, origin, destination, mode, *extra):
+    """Response cache key for resolved places, tied to the current dataset version."""
+    return cache_key(endpoint, origin['constituency'], origin['district'], destination['constituency'],
+                     destination['district'], mode, dataset_version(), scheme_signature(), *extra)
+
+
+def alternatives_for(strategy):
+    """``alternatives`` argument for the router under ``strategy``."""
+    return SAFEST_ALTERNATIVES if strategy == 'safest' else False
+
+
+def is_fallback(routes):
+    """Whether ``routes`` came from a fallback router (routing.mark_fallback, straight_line_routes)."""
+    return any(route.get('fallback') for route in routes)
+
+
+def build_plan(origin, destination, mode, strategy, routes):
+    """Score already-fetched ``routes`` into a plan (see plan_route).
+
+    ``fallback`` is set when OSRM could not answer; such plans must not be cached.
+    """
+    fallback = is_fallback(routes)
+    if strategy == 'safest':
+        routes = rank_routes(routes)
+    else:
+        route = routes[0]
+        routes = [dict(route, analysis=analyze_route(route['coords']), rank=1, extra_distance_km=0.0)]
+
+    return {'from': origin, 'to': destination, 'mode': mode, 'profile': PROFILE_MAP.get(mode, 'driving'),
+            'strategy': strategy, 'routes': routes, 'fallback': fallback}
+
+
+def plan_route(from_place, to_place, mode='car', strategy='fastest'):
+    """Resolve both places, fetch the route(s) and score them; no map rendering.
+
+    ``routes`` in the result is ordered best first and every entry carries
+    its ``analysis`` from route_analysis.
+    """
+    origin = resolve_place(from_place)
+    destination = resolve_place(to_place)
+    profile = PROFILE_MAP.get(mode, 'driving')
+    routes = get_routes(origin['lat'], origin['lng'], destination['lat'], destination['lng'],
+                        profile, alternatives_for(strategy))
+    return build_plan(origin, destination, mode, strategy, routes)
+
+
+def _endpoint(place):
+    return {'lat': place['lat'], 'lng': place['lng'], 'address': place['address'],
+            'district': place['district'], 'constituency': place['constituency']}
+
+
+def encode_directions(coords, encoding='coords', zoom=None):
+    """Route coordinates as sent to clients: optionally thinned for ``zoom`` and polyline-encoded."""
+    if zoom is not None:
+        coords = simplify_route(coords, zoom)
+    if encoding == 'polyline':
+        return encode_polyline(coords)
+    return coords
+
+
+def route_json(plan, encoding='coords', zoom=None):
+    """Compact JSON body for /generate_route (no HTML)."""
+    route = plan['routes'][0]
+    analysis = route['analysis']
+    response = {
+        'directions': encode_directions(route['coords'], encoding, zoom),
+        'encoding': encoding,
+        'from': _endpoint(plan['from']),
+        'to': _endpoint(plan['to']),
+        'transportMode': plan['mode'],
+        'strategy': plan['strategy'],
+        'duration': round(route['duration'] / 60),  # minutes
+        'distance': analysis['distance_km'],     # km
+        'constituencies': analysis['constituencies'],
+        'exposure': analysis['exposure'],
+        'overlay': route_overlay(analysis)
+    }
+    if plan['strategy'] == 'safest':
+        response['routes'] = [{
+            'rank': r['rank'],
+            'directions': encode_directions(r['coords'], encoding, zoom),
+            'duration': round(r['duration'] / 60),
+            'distance': r['analysis']['distance_km'],
+            'extra_distance': r['extra_distance_km'],
+            'constituencies': r['analysis']['constituencies'],
+            'exposure': r['analysis']['exposure']
+        } for r in plan['routes']]
+    return response
+
+
+def route_overlay(analysis):
+    """Ids and style of the highlighted constituencies, drawn over the static base layer."""
+    base = get_base_layer()
+    return {
+        'base_layer': {'version': base['version'], 'url': base['url'], 'levels': base['level_urls']},
+        'highlight': [c['id'] for c in analysis['constituencies']],
+        'style': ON_ROUTE_STYLE
+    }
+
+
+def route_geojson(plan, zoom=None):
+    """The plan as a GeoJSON FeatureCollection: one LineString per route plus start/end points."""
+    features = []
+    for r in plan['routes']:
+        coords = [[lon, lat] for lat, lon in encode_directions(r['coords'], zoom=zoom)]
+        features.append({
+            'type': 'Feature',
+            # A LineString needs two positions; a same-place route is a single point
+            'geometry': ({'type': 'LineString', 'coordinates': coords} if len(coords) > 1
+                         else {'type': 'Point', 'coordinates': coords[0]}),
+            'properties': {
+                'kind': 'route',
+                'rank': r['rank'],
+                'duration': round(r['duration'] / 60),
+                'distance': r['analysis']['distance_km'],
+                'constituencies': r['analysis']['constituencies'],
+                'exposure': r['analysis']['exposure']
+            }
+        })
+    for kind in ('from', 'to'):
+        place = plan[kind]
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [place['lng'], place['lat']]},
+            'properties': dict(_endpoint(place), kind=kind)
+        })
+    return {'type': 'FeatureCollection', 'features': features,
+            'properties': {'transportMode': plan['mode'], 'strategy': plan['strategy'],
+                           'overlay': route_overlay(plan['routes'][0]['analysis'])}}
+
+
+def render_map(plan, output_dir='../public'):
+    """Opt-in folium render of the best route; returns (filename, html)."""
+    return generate_map(plan['from']['address'], plan['to']['address'], plan['mode'], output_dir,
+                        route_coords=plan['routes'][0]['coords'], overlay_only=True)
+
+
+def restore_rendered_map(body, output_dir='../public'):
+    """Re-save the map of a cached rendered response body: the janitor may have evicted
+    the file since the entry was cached."""
+    save_map_html(json.loads(body)['html'], output_dir)
+
+
+def route_response(plan, fmt='json', encoding='coords', zoom=None, render=False, output_dir='../public'):
+    """The /generate_route body for ``plan``, with the rendered map when ``render`` is set."""
+    if fmt == 'geojson':
+        response = route_geojson(plan, zoom)
+    else:
+        response = route_json(plan, encoding, zoom)
+
+    # The folium HTML document is only built on request
+    if render:
+        response['filename'], response['html'] = render_map(plan, output_dir)
+    return response
@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from local_routing import get_local_router
+
+# Configuration (override through the environment)
+OSRM_URL = os.environ.get('OSRM_URL', 'http://router.project-osrm.org').rstrip('/')
+CONNECT_TIMEOUT = float(os.environ.get('OSRM_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('OSRM_READ_TIMEOUT', 10))
+OSRM_RETRIES = int(os.environ.get('OSRM_RETRIES', 2))
+POOL_SIZE = int(os.environ.get('OSRM_POOL_SIZE', 16))
+
+# Coordinates are rounded to this many decimals (~110 m) for the request and cache key
+SNAP_DECIMALS = int(os.environ.get('ROUTE_SNAP_DECIMALS', 3))
+ROUTE_CACHE_SIZE = int(os.environ.get('ROUTE_CACHE_SIZE', 2048))
+ROUTE_CACHE_TTL = float(os.environ.get('ROUTE_CACHE_TTL', 6 * 3600))
+ROUTE_CACHE_FILE = os.environ.get('ROUTE_CACHE_FILE') or None
+
+# 'osrm' (remote only), 'local' (in-process graph only) or 'auto' (OSRM, local graph on failure)
+ROUTING_PROVIDER = os.environ.get('ROUTING_PROVIDER', 'auto').lower()
+
+
+def snap(value, decimals=SNAP_DECIMALS):
+    return round(float(value), decimals)
+
+
+def alternatives_param(alternatives):
+    """OSRM ``alternatives`` value: 'false', 'true' or a requested count."""
+    if alternatives is True or alternatives == 1:
+        return 'true'
+    if not alternatives:
+        return 'false'
+    return str(int(alternatives))
+
+
+def route_key(lat1, lon1, lat2, lon2, profile, alternatives=False):
+    """Cache key of a route request: (profile, snapped coordinates, alternatives)."""
+    return (profile, snap(lat1), snap(lon1), snap(lat2), snap(lon2), alternatives_param(alternatives))
+
+
+def route_request(base_url, key):
+    """(url, query params) of the OSRM route request for a route_key()."""
+    profile, slat1, slon1, slat2, slon2, alternatives = key
+    url = f"{base_url}/route/v1/{profile}/{slon1},{slat1};{slon2},{slat2}"
+    return url, {'overview': 'full', 'geometries': 'geojson', 'alternatives': alternatives}
+
+
+def parse_routes(data):
+    """Routes of an OSRM response body; ValueError when it has none."""
+    if data.get('code', 'Ok') != 'Ok' or not data.get('routes'):
+        raise ValueError(f"{data.get('code')} {data.get('message', '')}".strip())
+    return [{
+        'coords': [[lat, lon] for lon, lat in r['geometry']['coordinates']],
+        'distance': r.get('distance'),
+        'duration': r.get('duration'),
+    } for r in data['routes']]
+
+
+class RouteCache:
+    """Thread-safe LRU cache with per-entry TTL and optional SQLite persistence."""
+
+    def __init__(self, maxsize=ROUTE_CACHE_SIZE, ttl=ROUTE_CACHE_TTL, path=ROUTE_CACHE_FILE):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if path:
+            with self._connect() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, stored_at REAL, value TEXT)")
+
+    def _connect(self):
+        # One connection per thread, reused across calls; a forked worker opens its own
+        # instead of sharing the one it inherited (preload_app builds the cache in the master)
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = self._local.db = sqlite3.connect(self.path, timeout=5)
+            self._local.pid = os.getpid()
+        return db
+
+    def _fresh(self, stored_at):
+        return time.time() - stored_at < self.ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._fresh(entry[0]):
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+        if not self.path:
+            return None
+        with self._connect() as db:
+            row = db.execute("SELECT stored_at, value FROM routes WHERE key = ?", (json.dumps(key),)).fetchone()
+        if row is None or not self._fresh(row[0]):
+            return None
+        value = json.loads(row[1])
+        self._remember(key, row[0], value)
+        return value
+
+    def put(self, key, value):
+        stored_at = time.time()
+        self._remember(key, stored_at, value)
+        if self.path:
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO routes VALUES (?, ?, ?)",
+                           (json.dumps(key), stored_at, json.dumps(value)))
+
+    def _remember(self, key, stored_at, value):
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class OSRMClient:
+    """OSRM route client over a pooled session with bounded timeouts and retries.
+
+    Routes are cached on (profile, snapped origin, snapped destination,
+    alternatives), so repeated city-pair queries are answered in-process.
+    """
+
+    def __init__(self, base_url=OSRM_URL, cache=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 retries=OSRM_RETRIES, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache if cache is not None else RouteCache()
+        self.timeout = timeout
+
+        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504],
+                      allowed_methods=['GET'], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def routes(self, lat1, lon1, lat2, lon2, profile='driving', alternatives=False):
+        """List of ``{'coords', 'distance', 'duration'}`` (metres, seconds), best first.
+
+        ``alternatives`` may be a bool or the number of alternative routes wanted.
+
+        Raises ``requests.RequestException`` on transport errors and
+        ``ValueError`` when OSRM answers without a usable route.
+        """
+        key = route_key(lat1, lon1, lat2, lon2, profile, alternatives)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        url, params = route_request(self.base_url, key)
+        resp = self.session.get(url, params=params, timeout=self.timeout)
+        if resp.status_code != 200:
+            raise ValueError(f"Status {resp.status_code}, Response: {resp.text[:200]}")
+
+        routes = parse_routes(resp.json())
+        self.cache.put(key, routes)
+        return routes
+
+    def route(self, lat1, lon1, lat2, lon2, profile='driving'):
+        return self.routes(lat1, lon1, lat2, lon2, profile)[0]
+
+
+def mark_fallback(routes):
+    """Tag routes from a fallback router, so that they are served but never cached as answers."""
+    return [dict(route, fallback=True) for route in routes]
+
+
+class FallbackRouter:
+    """Try ``primary`` and answer from ``fallback`` when it fails."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def routes(self, lat1, lon1, lat2, lon2, profile='driving', alternatives=False):
+        try:
+            return self.primary.routes(lat1, lon1, lat2, lon2, profile, alternatives)
+        except (requests.RequestException, ValueError) as e:
+            print(f"OSRM Error: {e}; using local routing graph")
+            return mark_fallback(self.fallback.routes(lat1, lon1, lat2, lon2, profile, alternatives))
+
+    def route(self, lat1, lon1, lat2, lon2, profile='driving'):
+        return self.routes(lat1, lon1, lat2, lon2, profile)[0]
+
+
+class LocalRouter:
+    """Delegates to the current local graph, rebuilt by the dataset store on data changes."""
+
+    def routes(self, lat1, lon1, lat2, lon2, profile='driving', alternatives=False):
+        return get_local_router().routes(lat1, lon1, lat2, lon2, profile, alternatives)
+
+    def route(self, lat1, lon1, lat2, lon2, profile='driving'):
+        return self.routes(lat1, lon1, lat2, lon2, profile)[0]
+
+
+_client = None
+_router = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OSRMClient()
+    return _client
+
+
+def _make_router():
+    if ROUTING_PROVIDER == 'local':
+        return LocalRouter()
+    if ROUTING_PROVIDER == 'osrm':
+        return get_client()
+    return FallbackRouter(get_client(), LocalRouter())
+
+
+def get_router():
+    """Routing provider selected by ROUTING_PROVIDER; all expose routes() and route()."""
+    global _router
+    if _router is None:
+        router = _make_router()
+        with _client_lock:
+            if _router is None:
+                _router = router
+    return _router
@@ -0,0 +1,120 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no flock, so coalescing stays per process
+    fcntl = None
+
+# Keys share this many lock files per directory, which keeps the directory bounded
+LOCK_STRIPES = 1024
+# Seconds to wait for another process's computation before running our own anyway
+LOCK_TIMEOUT = float(os.environ.get('FLIGHT_LOCK_TIMEOUT', 10))
+LOCK_POLL = 0.05
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in
+    flight block and receive the same result (or exception). Nothing is kept
+    once the call completes, so this only deduplicates, it does not cache.
+    Coalescing is per process; see key_lock for other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines on one event loop.
+
+    The shared computation runs as its own task, so a client disconnecting
+    does not cancel it for the others waiting on the same key.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+@contextmanager
+def key_lock(directory, key, timeout=LOCK_TIMEOUT):
+    """Exclusive lock on ``key`` among all processes sharing ``directory`` (flock).
+
+    Waits at most ``timeout`` seconds, then proceeds unlocked so that a slow
+    holder delays the others but never stalls them. The lock goes with the
+    holder's file, so a crashed holder releases it. Keys hash onto
+    LOCK_STRIPES files and may now and then share one. Without fcntl or a
+    directory this locks nothing.
+    """
+    if fcntl is None or not directory:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    stripe = int(hashlib.sha1(key.encode()).hexdigest()[:8], 16) % LOCK_STRIPES
+    deadline = time.monotonic() + timeout
+    with open(os.path.join(directory, f"{stripe:04d}.lock"), 'a') as f:
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(LOCK_POLL)
+        # Closing the file releases the lock
+        yield
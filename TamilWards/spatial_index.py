@@ -0,0 +1,49 @@
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from datastore import GEOJSON_FILE, store
+
+
+class WardIndex:
+    """STRtree over the assembly polygons, positionally aligned with the wards frame.
+
+    The polygons are prepared once so the exact predicate that follows the
+    bounding-box pass of every query is cheap.
+    """
+
+    def __init__(self, wards):
+        self.geoms = np.asarray(wards.geometry.array, dtype=object)
+        shapely.prepare(self.geoms)
+        self.tree = STRtree(self.geoms)
+
+    def __len__(self):
+        return len(self.geoms)
+
+    def query(self, geometry, predicate='intersects'):
+        """Sorted positions of the polygons satisfying ``predicate`` with ``geometry``."""
+        return np.sort(self.tree.query(geometry, predicate=predicate))
+
+    def locate(self, lats, lons):
+        """Position of the polygon containing each point, -1 where none does.
+
+        One bulk query for all points; a point on a shared boundary gets the
+        lowest position.
+        """
+        points = shapely.points(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+        point_idx, ward_idx = self.tree.query(points, predicate='intersects')
+        positions = np.full(len(points), -1, dtype=np.int64)
+        # Assign in descending ward order so the lowest position is written last
+        order = np.argsort(ward_idx, kind='stable')[::-1]
+        positions[point_idx[order]] = ward_idx[order]
+        return positions
+
+    def mask(self, geometry, predicate='intersects'):
+        hits = np.zeros(len(self.geoms), dtype=bool)
+        hits[self.query(geometry, predicate)] = True
+        return hits
+
+
+def get_ward_index(geojson_file=GEOJSON_FILE):
+    return store.derived(('ward_index', geojson_file), [geojson_file],
+                         lambda: WardIndex(store.read_geojson(geojson_file)))
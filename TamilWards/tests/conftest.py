@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The modules are imported by plain name, as when running from TamilWards/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubServer:
+    """Local HTTP server answering GETs from a script of ``(status, headers, body)``.
+
+    Requests beyond the script get its last answer. ``requests`` records the
+    paths asked for; ``delay`` holds every answer back that many seconds.
+    """
+
+    def __init__(self, script, delay=0.0):
+        self.script = list(script)
+        self.delay = delay
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                status, headers, body = stub.script[min(len(stub.requests), len(stub.script)) - 1]
+                if stub.delay:
+                    threading.Event().wait(stub.delay)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Factory for StubServers, all shut down after the test."""
+    servers = []
+
+    def start(script, delay=0.0):
+        server = StubServer(script, delay)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
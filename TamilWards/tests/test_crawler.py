@@ -0,0 +1,98 @@
+import time
+import asyncio
+
+import aiohttp
+import pytest
+
+import crawler
+from crawler import AsyncCrimeDataCollector
+from ratelimit import retry_after_seconds
+
+PAGE = (200, {'Content-Type': 'text/html'}, b'<html>ok</html>')
+UNAVAILABLE = (503, {}, b'busy')
+URL = 'https://news.example/search?q=salem'
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(crawler, 'BACKOFF_BASE', 0.01)
+    monkeypatch.setattr(crawler, 'BACKOFF_MAX', 0.05)
+
+
+def fetch(server, urls, retries=3, rate=1000.0, wait=0.0):
+    """Fetch ``urls`` one after another through a collector pointed at ``server``, sleeping ``wait``
+    seconds in between; returns (bodies, collector)."""
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            collector = AsyncCrimeDataCollector(session, host_overrides={'news.example': server.url},
+                                                host_rates={'news.example': rate}, retries=retries,
+                                                cache=None, offline=False)
+            bodies = []
+            for i, url in enumerate(urls):
+                if i and wait:
+                    await asyncio.sleep(wait)
+                bodies.append(await collector.fetch(url))
+            return bodies, collector
+    return asyncio.run(run())
+
+
+def test_retries_5xx_then_succeeds(stub_server):
+    server = stub_server([UNAVAILABLE, UNAVAILABLE, PAGE])
+    (body,), collector = fetch(server, [URL])
+    assert body == b'<html>ok</html>'
+    assert (collector.fetches, collector.failures, collector.retried) == (3, 2, 2)
+    assert server.requests == ['/search?q=salem'] * 3
+
+
+def test_honours_retry_after_and_slows_down_on_429(stub_server):
+    server = stub_server([(429, {'Retry-After': '1'}, b''), PAGE])
+    started = time.monotonic()
+    (body,), collector = fetch(server, [URL])
+    assert body == b'<html>ok</html>'
+    assert time.monotonic() - started >= 0.9
+    # Halved by the 429, then a twentieth won back by the success
+    assert collector._host('news.example').bucket.rate == pytest.approx(550.0)
+
+
+def test_gives_up_after_retries(stub_server):
+    server = stub_server([UNAVAILABLE])
+    (body,), collector = fetch(server, [URL], retries=2)
+    assert body is None
+    assert len(server.requests) == 3
+
+
+def test_not_found_is_not_retried(stub_server):
+    server = stub_server([(404, {}, b'')])
+    (body,), collector = fetch(server, [URL])
+    assert body is None
+    assert len(server.requests) == 1
+    assert not collector._host('news.example').breaker.is_open
+
+
+def test_open_circuit_skips_the_host(stub_server, monkeypatch):
+    monkeypatch.setattr(crawler, 'BREAKER_FAILURES', 2)
+    monkeypatch.setattr(crawler, 'BREAKER_COOLDOWN', 60)
+    server = stub_server([UNAVAILABLE])
+    bodies, collector = fetch(server, [URL, URL + '&page=2'], retries=3)
+    assert bodies == [None, None]
+    # Two failures open the circuit; every later attempt is refused without a request
+    assert len(server.requests) == 2
+    assert collector.skipped == 2
+    assert collector._host('news.example').breaker.is_open
+
+
+def test_circuit_probes_after_cooldown(stub_server, monkeypatch):
+    monkeypatch.setattr(crawler, 'BREAKER_FAILURES', 1)
+    monkeypatch.setattr(crawler, 'BREAKER_COOLDOWN', 0.2)
+    server = stub_server([UNAVAILABLE, PAGE])
+    bodies, collector = fetch(server, [URL, URL], retries=0, wait=0.3)
+    assert bodies == [None, b'<html>ok</html>']
+    assert not collector._host('news.example').breaker.is_open
+
+
+def test_retry_after_formats():
+    assert retry_after_seconds('7', cap=120) == 7.0
+    assert retry_after_seconds('600', cap=120) == 120
+    assert retry_after_seconds('Wed, 21 Oct 2015 07:28:00 GMT', cap=120) == 0.0
+    assert retry_after_seconds('soon', cap=120) is None
+    assert retry_after_seconds(None, cap=120) is None
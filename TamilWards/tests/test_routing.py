@@ -0,0 +1,86 @@
+import pytest
+import requests
+
+from routing import FallbackRouter, OSRMClient, RouteCache
+
+SALEM = (11.664, 78.146)
+ERODE = (11.341, 77.717)
+
+OK = (200, {'Content-Type': 'application/json'}, {
+    'code': 'Ok',
+    'routes': [{'geometry': {'coordinates': [[78.146, 11.664], [77.717, 11.341]]},
+                'distance': 66000, 'duration': 3600}],
+})
+UNAVAILABLE = (503, {}, b'busy')
+
+
+def client(url, retries=2, timeout=(1, 1)):
+    return OSRMClient(url, cache=RouteCache(path=None), timeout=timeout, retries=retries)
+
+
+class LocalStub:
+    """Stands in for the local graph: one fixed route."""
+
+    def routes(self, lat1, lon1, lat2, lon2, profile='driving', alternatives=False):
+        return [{'coords': [[lat1, lon1], [lat2, lon2]], 'distance': 1.0, 'duration': 1.0}]
+
+
+def test_retries_transient_statuses(stub_server):
+    osrm = stub_server([UNAVAILABLE, UNAVAILABLE, OK])
+    routes = client(osrm.url).routes(*SALEM, *ERODE)
+    assert len(osrm.requests) == 3
+    assert routes[0]['coords'] == [[11.664, 78.146], [11.341, 77.717]]
+    assert routes[0]['distance'] == 66000
+
+
+def test_caches_on_snapped_coordinates(stub_server):
+    osrm = stub_server([OK])
+    router = client(osrm.url)
+    router.routes(*SALEM, *ERODE)
+    # Within the snapping grid: served from the cache
+    router.routes(SALEM[0] + 0.0001, SALEM[1], *ERODE)
+    assert len(osrm.requests) == 1
+    assert osrm.requests[0].startswith('/route/v1/driving/78.146,11.664;77.717,11.341?')
+
+
+def test_raises_once_retries_are_spent(stub_server):
+    osrm = stub_server([UNAVAILABLE])
+    with pytest.raises(ValueError, match='Status 503'):
+        client(osrm.url, retries=1).routes(*SALEM, *ERODE)
+    assert len(osrm.requests) == 2
+
+
+def test_raises_on_no_route(stub_server):
+    osrm = stub_server([(200, {}, {'code': 'NoRoute', 'routes': []})])
+    with pytest.raises(ValueError):
+        client(osrm.url).routes(*SALEM, *ERODE)
+
+
+@pytest.mark.parametrize('script, delay', [
+    ([(500, {}, b'error')], 0.0),     # not retried
+    ([UNAVAILABLE], 0.0),             # retried, then given up
+    ([OK], 1.5),                      # slower than the read timeout
+])
+def test_falls_back_when_osrm_fails(stub_server, script, delay):
+    osrm = stub_server(script, delay)
+    routes = FallbackRouter(client(osrm.url, retries=1, timeout=(1, 0.5)), LocalStub()).routes(*SALEM, *ERODE)
+    assert routes[0]['fallback'] is True
+    assert routes[0]['coords'] == [list(SALEM), list(ERODE)]
+
+
+def test_falls_back_when_osrm_is_unreachable(stub_server):
+    osrm = stub_server([OK])
+    url = osrm.url
+    osrm.close()
+    with pytest.raises(requests.ConnectionError):
+        client(url, retries=0).routes(*SALEM, *ERODE)
+    routes = FallbackRouter(client(url, retries=0), LocalStub()).routes(*SALEM, *ERODE)
+    assert routes[0]['fallback'] is True
+
+
+def test_fallback_routes_are_not_cached(stub_server):
+    osrm = stub_server([UNAVAILABLE, UNAVAILABLE, OK])
+    router = FallbackRouter(client(osrm.url, retries=1), LocalStub())
+    assert router.routes(*SALEM, *ERODE)[0]['fallback'] is True
+    # OSRM has recovered: the next call asks it again
+    assert 'fallback' not in router.routes(*SALEM, *ERODE)[0]
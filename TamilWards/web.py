@@ -1,14 +1,14 @@
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
+import os
 import time
 from datetime import datetime, timedelta
 import logging
+import asyncio
 from urllib.parse import quote, urljoin
 import json
 from shapely.geometry import shape
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import re
 import random
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -16,6 +16,9 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import warnings
+from datastore import BASE_DIR, GEOJSON_FILE, REPORT_PREFIX, write_columnar
+from matcher import MultiMatcher, matcher_for
+from zones import ZONE_SCHEME, categorize, check_scheme
 warnings.filterwarnings('ignore')
 
 # Enhanced Logger Setup
@@ -23,8 +26,7 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 # Configuration
-MAX_THREADS = 8
-REQUEST_DELAY = 0.5  # Increased delay for reliability
+REQUEST_DELAY = 0.5  # Increased delay for reliability (CrimeDataCollector; crawler.py limits per host instead)
 SELENIUM_DELAY = 2
 
 # Comprehensive Crime Keywords (English + Tamil transliterations)
@@ -87,6 +89,219 @@ def setup_selenium_driver():
         logger.warning(f"Selenium setup failed: {e}")
         return None
 
+# Fixed section pages, the same for every location
+NEW_INDIAN_EXPRESS_URL = "https://www.newindianexpress.com/states/tamil-nadu/"
+DAILY_THANTHI_URL = "https://www.dailythanthi.com/News/State"
+DINAMALAR_URL = "https://www.dinamalar.com/news.php"
+
+# Listing sources: name -> (article CSS classes, articles inspected per page)
+LISTING_SOURCES = {
+    'The Hindu': (['story-card', 'story-card-news', 'element'], 25),
+    'New Indian Express': (['story-headline', 'news-item', 'article'], 30),
+    'Daily Thanthi': (['news-title', 'story-card', 'news-item'], 20),
+}
+# Dinamalar: mentions of a location inspected on its news page
+DINAMALAR_LIMIT = 15
+
+# Pages that are the same for every location: fetched and parsed once per crawl (crawler.py)
+SHARED_LISTINGS = {
+    'New Indian Express': NEW_INDIAN_EXPRESS_URL,
+    'Daily Thanthi': DAILY_THANTHI_URL,
+    'Dinamalar': DINAMALAR_URL,
+}
+
+# Simulated official statistics by district (would be replaced with real API calls)
+BASE_CRIME_RATE = {
+    'chennai': 15, 'coimbatore': 8, 'madurai': 12, 'salem': 7, 'tirupur': 6,
+    'erode': 5, 'vellore': 9, 'thanjavur': 4, 'tirunelveli': 6, 'kanchipuram': 8,
+    'thiruvallur': 7, 'cuddalore': 5, 'namakkal': 4, 'karur': 3, 'perambalur': 2,
+    'ariyalur': 2, 'nagapattinam': 3, 'thiruvarur': 3, 'pudukkottai': 4,
+    'ramanathapuram': 5, 'sivaganga': 4, 'virudhunagar': 5, 'theni': 4,
+    'dindigul': 6, 'krishnagiri': 5, 'dharmapuri': 4, 'tiruvannamalai': 6,
+    'villupuram': 5, 'kallakurichi': 3, 'chengalpattu': 7, 'tenkasi': 4,
+    'tirupathur': 3, 'ranipet': 4, 'mayiladuthurai': 3, 'nilgiris': 2
+}
+
+# Crime keywords, lowercased once, and compiled into one matcher
+CRIME_TERMS = frozenset(keyword.lower() for keyword in CRIME_KEYWORDS)
+CRIME_MATCHER = MultiMatcher(CRIME_TERMS)
+
+def has_crime_keyword(text):
+    return CRIME_MATCHER.any(text)
+
+def article_matcher(needles):
+    """Matcher for the crime keywords plus lowercased location names, so one scan of an article finds both"""
+    return matcher_for(tuple(sorted(CRIME_TERMS.union(needles))))
+
+def google_news_urls(location):
+    """Google News RSS search URLs for a location (6 enhanced queries)"""
+    search_queries = [
+        f"{location} crime news",
+        f"{location} police case",
+        f"{location} arrest news",
+        f"{location} court case",
+        f"{location} FIR registered",
+        f"{location} investigation",
+        f"{location} tamil nadu police",
+        f"{location} district collector crime"
+    ]
+    urls = []
+    for query in search_queries[:6]:  # Limit queries to avoid rate limiting
+        encoded_query = quote(f"{query} site:timesofindia.indiatimes.com OR site:thehindu.com OR site:newindianexpress.com")
+        urls.append(f"https://news.google.com/rss/search?q={encoded_query}&hl=en-IN&gl=IN&ceid=IN:en")
+    return urls
+
+def the_hindu_urls(location):
+    """The Hindu Tamil Nadu section searches"""
+    return [
+        f"https://www.thehindu.com/tag/tamil-nadu/?q={quote(location)}",
+        f"https://www.thehindu.com/news/cities/chennai/?q={quote(location)}",
+        f"https://www.thehindu.com/news/cities/Madurai/?q={quote(location)}"
+    ]
+
+def parse_google_news(content, location):
+    """Crime items about ``location`` in a Google News RSS response"""
+    crime_count = 0
+    references = []
+    needle = location.lower()
+    matcher = article_matcher([needle])
+    soup = BeautifulSoup(content, 'xml')
+    items = soup.find_all('item')[:15]
+    
+    for item in items:
+        title = item.find('title').text if item.find('title') else ""
+        description = item.find('description').text if item.find('description') else ""
+        pub_date = item.find('pubDate').text if item.find('pubDate') else ""
+        link = item.find('link').text if item.find('link') else ""
+        
+        # Check for recent dates (2022-2025)
+        if any(year in pub_date for year in ['2022', '2023', '2024', '2025']):
+            text_content = (title + " " + description).lower()
+            
+            # Check for location and crime keywords
+            found = matcher.find(text_content)
+            if needle in found and not CRIME_TERMS.isdisjoint(found):
+                crime_count += 1
+                references.append({
+                    'source': 'Google News',
+                    'title': title[:100],
+                    'date': pub_date,
+                    'url': link
+                })
+    return crime_count, references
+
+def listing_articles(content, page_url, source):
+    """Article table of a listing page: (lowercased text, url) of each article inspected for ``source``"""
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    if source == 'Dinamalar':
+        # Tags with a single text child; which locations they mention is up to match_articles
+        return [(tag.string.lower(), page_url) for tag in soup.find_all(['a', 'div']) if tag.string is not None]
+    
+    classes, limit = LISTING_SOURCES[source]
+    articles = []
+    for article in soup.find_all(['a', 'div'], class_=classes)[:limit]:
+        href = article.get('href', '') if article.name == 'a' else ''
+        articles.append((article.get_text().lower(), urljoin(page_url, href) if href else page_url))
+    return articles
+
+def match_articles(articles, locations, source):
+    """{location: (crime count, references)} for all ``locations`` in one pass over an article table"""
+    by_needle = {}
+    for location in dict.fromkeys(locations):
+        by_needle.setdefault(location.lower(), []).append(location)
+    matcher = article_matcher(by_needle)
+    counts = dict.fromkeys(locations, 0)
+    references = {location: [] for location in locations}
+    mentions = dict.fromkeys(locations, 0)
+    
+    for text, url in articles:
+        # One scan finds the crime keywords and every location the article names
+        found = matcher.find(text)
+        is_crime = not CRIME_TERMS.isdisjoint(found)
+        named = [location for needle in found.intersection(by_needle) for location in by_needle[needle]]
+        for location in named:
+            if source == 'Dinamalar':
+                # Only the first DINAMALAR_LIMIT mentions of a location are inspected
+                if mentions[location] >= DINAMALAR_LIMIT:
+                    continue
+                mentions[location] += 1
+            if is_crime:
+                counts[location] += 1
+                references[location].append({
+                    'source': source,
+                    'title': text[:100],
+                    'url': url
+                })
+    return {location: (counts[location], references[location]) for location in locations}
+
+def match_listing_page(content, page_url, locations, source):
+    """Parse a listing page once and match every location against it"""
+    return match_articles(listing_articles(content, page_url, source), locations, source)
+
+def parse_listing(content, page_url, location, source):
+    """Crime articles about ``location`` on a news listing page of ``source``"""
+    return match_listing_page(content, page_url, [location], source)[location]
+
+def estimated_crime_statistics(location):
+    """Official crime statistics (simulated data based on known patterns)"""
+    crime_count = 0
+    references = []
+    
+    # Find matching district
+    location_lower = location.lower()
+    for district, base_rate in BASE_CRIME_RATE.items():
+        if district in location_lower or location_lower in district:
+            # Add random variation to simulate real data
+            crime_count = base_rate + random.randint(0, 5)
+            references.append({
+                'source': 'TN Police Statistics (Estimated)',
+                'title': f'Crime statistics for {location}',
+                'url': 'https://tnpolice.gov.in'
+            })
+            break
+    
+    # Default minimum crime count for any location
+    if crime_count == 0:
+        crime_count = random.randint(2, 7)
+        references.append({
+            'source': 'Local Crime Records (Estimated)',
+            'title': f'Regional crime data for {location}',
+            'url': 'https://police.tn.gov.in'
+        })
+    return crime_count, references
+
+def combine_crime_data(location, source_results):
+    """Total crime count, normalized crime index and references from per-source (count, refs)"""
+    total_crime_count = 0
+    all_references = []
+    for crimes, refs in source_results:
+        total_crime_count += crimes
+        all_references.extend(refs)
+    
+    # Ensure minimum crime count (realistic baseline)
+    if total_crime_count < 3:
+        total_crime_count += random.randint(3, 8)
+        all_references.append({
+            'source': 'Local Police Records (Baseline)',
+            'title': f'Minimum crime incidents for {location}',
+            'url': 'https://tnpolice.gov.in'
+        })
+        
+    # Calculate normalized crime index
+    max_expected_crimes = 50  # Adjusted for more realistic scoring
+    normalized_crime_index = min(1.0, total_crime_count / max_expected_crimes)
+    
+    return total_crime_count, normalized_crime_index, all_references
+
+def fallback_crime_data(location):
+    """Minimum baseline when collection fails"""
+    return random.randint(2, 6), 0.1, [{
+        'source': 'Fallback Data',
+        'title': f'Basic crime data for {location}',
+        'url': 'N/A'
+    }]
+
 class CrimeDataCollector:
     def __init__(self):
         self.session = requests.Session()
@@ -97,49 +312,14 @@ class CrimeDataCollector:
         crime_count = 0
         references = []
         
-        # Enhanced search queries
-        search_queries = [
-            f"{location} crime news",
-            f"{location} police case",
-            f"{location} arrest news",
-            f"{location} court case",
-            f"{location} FIR registered",
-            f"{location} investigation",
-            f"{location} tamil nadu police",
-            f"{location} district collector crime"
-        ]
-        
-        for query in search_queries[:6]:  # Limit queries to avoid rate limiting
+        for url in google_news_urls(location):
             try:
-                encoded_query = quote(f"{query} site:timesofindia.indiatimes.com OR site:thehindu.com OR site:newindianexpress.com")
-                url = f"https://news.google.com/rss/search?q={encoded_query}&hl=en-IN&gl=IN&ceid=IN:en"
-                
                 response = self.session.get(url, headers=get_random_headers(), timeout=15)
                 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'xml')
-                    items = soup.find_all('item')[:15]
-                    
-                    for item in items:
-                        title = item.find('title').text if item.find('title') else ""
-                        description = item.find('description').text if item.find('description') else ""
-                        pub_date = item.find('pubDate').text if item.find('pubDate') else ""
-                        link = item.find('link').text if item.find('link') else ""
-                        
-                        # Check for recent dates (2022-2025)
-                        if any(year in pub_date for year in ['2022', '2023', '2024', '2025']):
-                            text_content = (title + " " + description).lower()
-                            
-                            # Check for location and crime keywords
-                            if (location.lower() in text_content and 
-                                any(keyword.lower() in text_content for keyword in CRIME_KEYWORDS)):
-                                crime_count += 1
-                                references.append({
-                                    'source': 'Google News',
-                                    'title': title[:100],
-                                    'date': pub_date,
-                                    'url': link
-                                })
+                    count, refs = parse_google_news(response.content, location)
+                    crime_count += count
+                    references.extend(refs)
                 
                 time.sleep(REQUEST_DELAY + random.uniform(0.1, 0.3))
                 
@@ -154,109 +334,44 @@ class CrimeDataCollector:
         crime_count = 0
         references = []
         
-        try:
-            # The Hindu Tamil Nadu section
-            search_urls = [
-                f"https://www.thehindu.com/tag/tamil-nadu/?q={quote(location)}",
-                f"https://www.thehindu.com/news/cities/chennai/?q={quote(location)}",
-                f"https://www.thehindu.com/news/cities/Madurai/?q={quote(location)}"
-            ]
-            
-            for url in search_urls:
-                try:
-                    response = self.session.get(url, headers=get_random_headers(), timeout=15)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        articles = soup.find_all(['a', 'div'], class_=['story-card', 'story-card-news', 'element'])
-                        
-                        for article in articles[:25]:
-                            text = article.get_text().lower()
-                            href = article.get('href', '') if article.name == 'a' else ''
-                            
-                            if (location.lower() in text and 
-                                any(keyword.lower() in text for keyword in CRIME_KEYWORDS)):
-                                crime_count += 1
-                                references.append({
-                                    'source': 'The Hindu',
-                                    'title': text[:100],
-                                    'url': urljoin(url, href) if href else url
-                                })
-                    
-                    time.sleep(REQUEST_DELAY)
-                except Exception as e:
-                    logger.warning(f"Error searching The Hindu for {location}: {e}")
-                    
-        except Exception as ex:
-            logger.warning(f"Exception in The Hindu search for {location}: {ex}")
+        for url in the_hindu_urls(location):
+            try:
+                response = self.session.get(url, headers=get_random_headers(), timeout=15)
+                if response.status_code == 200:
+                    count, refs = parse_listing(response.content, url, location, 'The Hindu')
+                    crime_count += count
+                    references.extend(refs)
+                
+                time.sleep(REQUEST_DELAY)
+            except Exception as e:
+                logger.warning(f"Error searching The Hindu for {location}: {e}")
             
         return crime_count, references
 
-    def search_new_indian_express(self, location):
-        """Search New Indian Express"""
+    def search_listing(self, location, source, search_url):
         crime_count = 0
         references = []
         
         try:
-            search_url = f"https://www.newindianexpress.com/states/tamil-nadu/"
             response = self.session.get(search_url, headers=get_random_headers(), timeout=15)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                articles = soup.find_all(['a', 'div'], class_=['story-headline', 'news-item', 'article'])
-                
-                for article in articles[:30]:
-                    text = article.get_text().lower()
-                    href = article.get('href', '') if article.name == 'a' else ''
-                    
-                    if (location.lower() in text and 
-                        any(keyword.lower() in text for keyword in CRIME_KEYWORDS)):
-                        crime_count += 1
-                        references.append({
-                            'source': 'New Indian Express',
-                            'title': text[:100],
-                            'url': urljoin(search_url, href) if href else search_url
-                        })
+                crime_count, references = parse_listing(response.content, search_url, location, source)
             
             time.sleep(REQUEST_DELAY)
             
         except Exception as ex:
-            logger.warning(f"Exception in New Indian Express search for {location}: {ex}")
+            logger.warning(f"Exception in {source} search for {location}: {ex}")
             
         return crime_count, references
 
+    def search_new_indian_express(self, location):
+        """Search New Indian Express"""
+        return self.search_listing(location, 'New Indian Express', NEW_INDIAN_EXPRESS_URL)
+
     def search_daily_thanthi(self, location):
         """Search Daily Thanthi (Tamil newspaper)"""
-        crime_count = 0
-        references = []
-        
-        try:
-            # Daily Thanthi Tamil Nadu section
-            search_url = "https://www.dailythanthi.com/News/State"
-            response = self.session.get(search_url, headers=get_random_headers(), timeout=15)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                articles = soup.find_all(['a', 'div'], class_=['news-title', 'story-card', 'news-item'])
-                
-                for article in articles[:20]:
-                    text = article.get_text().lower()
-                    href = article.get('href', '') if article.name == 'a' else ''
-                    
-                    if (location.lower() in text and 
-                        any(keyword.lower() in text for keyword in CRIME_KEYWORDS)):
-                        crime_count += 1
-                        references.append({
-                            'source': 'Daily Thanthi',
-                            'title': text[:100],
-                            'url': urljoin(search_url, href) if href else search_url
-                        })
-            
-            time.sleep(REQUEST_DELAY)
-            
-        except Exception as ex:
-            logger.warning(f"Exception in Daily Thanthi search for {location}: {ex}")
-            
-        return crime_count, references
+        return self.search_listing(location, 'Daily Thanthi', DAILY_THANTHI_URL)
 
     def search_dinamalar(self, location):
         """Search Dinamalar (Tamil newspaper)"""
@@ -264,23 +379,10 @@ class CrimeDataCollector:
         references = []
         
         try:
-            search_url = "https://www.dinamalar.com/news.php"
-            response = self.session.get(search_url, headers=get_random_headers(), timeout=15)
+            response = self.session.get(DINAMALAR_URL, headers=get_random_headers(), timeout=15)
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                articles = soup.find_all(['a', 'div'], string=re.compile(location, re.IGNORECASE))
-                
-                for article in articles[:15]:
-                    text = article.get_text().lower() if hasattr(article, 'get_text') else str(article).lower()
-                    
-                    if any(keyword.lower() in text for keyword in CRIME_KEYWORDS):
-                        crime_count += 1
-                        references.append({
-                            'source': 'Dinamalar',
-                            'title': text[:100],
-                            'url': search_url
-                        })
+                crime_count, references = parse_listing(response.content, DINAMALAR_URL, location, 'Dinamalar')
             
             time.sleep(REQUEST_DELAY)
             
@@ -291,109 +393,29 @@ class CrimeDataCollector:
 
     def search_crime_statistics_api(self, location):
         """Search for official crime statistics (simulated data based on known patterns)"""
-        crime_count = 0
-        references = []
-        
         try:
-            # Simulate official statistics based on district patterns
-            # This would be replaced with actual API calls to government databases
-            base_crime_rate = {
-                'chennai': 15, 'coimbatore': 8, 'madurai': 12, 'salem': 7, 'tirupur': 6,
-                'erode': 5, 'vellore': 9, 'thanjavur': 4, 'tirunelveli': 6, 'kanchipuram': 8,
-                'thiruvallur': 7, 'cuddalore': 5, 'namakkal': 4, 'karur': 3, 'perambalur': 2,
-                'ariyalur': 2, 'nagapattinam': 3, 'thiruvarur': 3, 'pudukkottai': 4,
-                'ramanathapuram': 5, 'sivaganga': 4, 'virudhunagar': 5, 'theni': 4,
-                'dindigul': 6, 'krishnagiri': 5, 'dharmapuri': 4, 'tiruvannamalai': 6,
-                'villupuram': 5, 'kallakurichi': 3, 'chengalpattu': 7, 'tenkasi': 4,
-                'tirupathur': 3, 'ranipet': 4, 'mayiladuthurai': 3, 'nilgiris': 2
-            }
-            
-            # Find matching district
-            location_lower = location.lower()
-            for district, base_rate in base_crime_rate.items():
-                if district in location_lower or location_lower in district:
-                    # Add random variation to simulate real data
-                    crime_count = base_rate + random.randint(0, 5)
-                    references.append({
-                        'source': 'TN Police Statistics (Estimated)',
-                        'title': f'Crime statistics for {location}',
-                        'url': 'https://tnpolice.gov.in'
-                    })
-                    break
-            
-            # Default minimum crime count for any location
-            if crime_count == 0:
-                crime_count = random.randint(2, 7)
-                references.append({
-                    'source': 'Local Crime Records (Estimated)',
-                    'title': f'Regional crime data for {location}',
-                    'url': 'https://police.tn.gov.in'
-                })
-                    
+            return estimated_crime_statistics(location)
         except Exception as ex:
             logger.warning(f"Exception in crime statistics search for {location}: {ex}")
-            
-        return crime_count, references
+            return 0, []
 
     def get_comprehensive_crime_data(self, location):
         """Get crime data from all sources"""
-        total_crime_count = 0
-        all_references = []
-        
         try:
-            # Google News
-            google_crimes, google_refs = self.search_google_news_enhanced(location, CRIME_KEYWORDS)
-            total_crime_count += google_crimes
-            all_references.extend(google_refs)
-            
-            # The Hindu
-            hindu_crimes, hindu_refs = self.search_the_hindu(location)
-            total_crime_count += hindu_crimes
-            all_references.extend(hindu_refs)
-            
-            # New Indian Express
-            nie_crimes, nie_refs = self.search_new_indian_express(location)
-            total_crime_count += nie_crimes
-            all_references.extend(nie_refs)
-            
-            # Daily Thanthi
-            thanthi_crimes, thanthi_refs = self.search_daily_thanthi(location)
-            total_crime_count += thanthi_crimes
-            all_references.extend(thanthi_refs)
-            
-            # Dinamalar
-            dinamalar_crimes, dinamalar_refs = self.search_dinamalar(location)
-            total_crime_count += dinamalar_crimes
-            all_references.extend(dinamalar_refs)
-            
-            # Official Statistics (Estimated)
-            stats_crimes, stats_refs = self.search_crime_statistics_api(location)
-            total_crime_count += stats_crimes
-            all_references.extend(stats_refs)
-            
-            # Ensure minimum crime count (realistic baseline)
-            if total_crime_count < 3:
-                total_crime_count += random.randint(3, 8)
-                all_references.append({
-                    'source': 'Local Police Records (Baseline)',
-                    'title': f'Minimum crime incidents for {location}',
-                    'url': 'https://tnpolice.gov.in'
-                })
-                
-            # Calculate normalized crime index
-            max_expected_crimes = 50  # Adjusted for more realistic scoring
-            normalized_crime_index = min(1.0, total_crime_count / max_expected_crimes)
-            
-            return total_crime_count, normalized_crime_index, all_references
+            return combine_crime_data(location, [
+                self.search_google_news_enhanced(location, CRIME_KEYWORDS),
+                self.search_the_hindu(location),
+                self.search_new_indian_express(location),
+                self.search_daily_thanthi(location),
+                self.search_dinamalar(location),
+                # Official Statistics (Estimated)
+                self.search_crime_statistics_api(location),
+            ])
             
         except Exception as e:
             logger.error(f"Error getting comprehensive crime data for {location}: {e}")
             # Return minimum baseline
-            return random.randint(2, 6), 0.1, [{
-                'source': 'Fallback Data',
-                'title': f'Basic crime data for {location}',
-                'url': 'N/A'
-            }]
+            return fallback_crime_data(location)
 
 def calculate_safety_score(crime_index):
     """Calculate safety score with enhanced algorithm"""
@@ -409,6 +431,40 @@ def calculate_safety_score(crime_index):
     
     return round(max(0.1, min(1.0, safety_score)), 3)
 
+def location_result(item, crime_count, crime_index, references):
+    """Report row for one constituency"""
+    dist_name, ac_name, latitude, longitude = item
+    safety_score = calculate_safety_score(crime_index)
+    
+    logger.info(f"✓ Processed: {dist_name} - {ac_name} | Crimes: {crime_count} | Score: {safety_score} | Sources: {len(references)}")
+    
+    return {
+        "DIST_NAME": dist_name,
+        "AC_NAME": ac_name,
+        "Latitude": latitude,
+        "Longitude": longitude,
+        "Total_Crime_Count": crime_count,
+        "Crime_Index": crime_index,
+        "Safety_Score": safety_score,
+        "Reference_Count": len(references),
+        "Primary_Sources": ", ".join(list(set([ref['source'] for ref in references[:5]])))
+    }
+
+def baseline_result(item):
+    """Baseline row used instead of None when a constituency fails"""
+    dist_name, ac_name, latitude, longitude = item
+    return {
+        "DIST_NAME": dist_name,
+        "AC_NAME": ac_name,
+        "Latitude": latitude,
+        "Longitude": longitude,
+        "Total_Crime_Count": random.randint(3, 8),
+        "Crime_Index": 0.2,
+        "Safety_Score": 0.7,
+        "Reference_Count": 1,
+        "Primary_Sources": "Baseline Data"
+    }
+
 def analyze_location_enhanced(item):
     """Enhanced location analysis with comprehensive data collection"""
     dist_name, ac_name, latitude, longitude = item
@@ -417,69 +473,16 @@ def analyze_location_enhanced(item):
     collector = CrimeDataCollector()
     
     try:
-        crime_count, crime_index, references = collector.get_comprehensive_crime_data(location_name)
-        safety_score = calculate_safety_score(crime_index)
-        
-        logger.info(f"✓ Processed: {dist_name} - {ac_name} | Crimes: {crime_count} | Score: {safety_score} | Sources: {len(references)}")
-        
-        return {
-            "DIST_NAME": dist_name,
-            "AC_NAME": ac_name,
-            "Latitude": latitude,
-            "Longitude": longitude,
-            "Total_Crime_Count": crime_count,
-            "Crime_Index": crime_index,
-            "Safety_Score": safety_score,
-            "Reference_Count": len(references),
-            "Primary_Sources": ", ".join(list(set([ref['source'] for ref in references[:5]])))
-        }
+        return location_result(item, *collector.get_comprehensive_crime_data(location_name))
         
     except Exception as e:
         logger.error(f"❌ Error analyzing {dist_name}-{ac_name}: {e}")
         # Return baseline data instead of None
-        return {
-            "DIST_NAME": dist_name,
-            "AC_NAME": ac_name,
-            "Latitude": latitude,
-            "Longitude": longitude,
-            "Total_Crime_Count": random.randint(3, 8),
-            "Crime_Index": 0.2,
-            "Safety_Score": 0.7,
-            "Reference_Count": 1,
-            "Primary_Sources": "Baseline Data"
-        }
+        return baseline_result(item)
 
 def categorize_zone_enhanced(df):
-    """Enhanced zone categorization with better thresholds"""
-    # Use quartiles for better distribution
-    q1 = df['Total_Crime_Count'].quantile(0.25)
-    q3 = df['Total_Crime_Count'].quantile(0.75)
-    median = df['Total_Crime_Count'].median()
-    
-    def get_zone(count):
-        if count <= q1:
-            return "Safe Zone"
-        elif count <= median:
-            return "Low Risk Zone"
-        elif count <= q3:
-            return "Moderate Zone"
-        else:
-            return "High Risk Zone"
-    
-    def get_color(count):
-        if count <= q1:
-            return "#00FF00"  # Green
-        elif count <= median:
-            return "#FFFF00"  # Yellow
-        elif count <= q3:
-            return "#FFA500"  # Orange
-        else:
-            return "#FF0000"  # Red
-    
-    df['Safety_Zone'] = df['Total_Crime_Count'].apply(get_zone)
-    df['Zone_Color'] = df['Total_Crime_Count'].apply(get_color)
-    
-    return df
+    """Enhanced zone categorization with better thresholds (quartiles by default, see zones.py)"""
+    return categorize(df, palette='enhanced', zone_column='Safety_Zone')
 
 def extract_wards_from_geojson(geojson_path):
     """Extract wards from GeoJSON file"""
@@ -510,28 +513,27 @@ def extract_wards_from_geojson(geojson_path):
 
 def main():
     """Main execution function"""
-    geojson_file = r'F:\SIH\client\TamilWards\TAMIL NADU_ASSEMBLY.geojson'
+    geojson_file = GEOJSON_FILE
+    
+    # A misconfigured zone scheme would otherwise only fail after the whole crawl
+    try:
+        check_scheme(ZONE_SCHEME, palette='enhanced')
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return
     
     try:
         df_extract = extract_wards_from_geojson(geojson_file)
         items = [(row['DIST_NAME'], row['AC_NAME'], row['Latitude'], row['Longitude']) 
                 for idx, row in df_extract.iterrows()]
         
-        results = []
-        logger.info(f"🚀 Starting Enhanced Tamil Nadu Safety Analysis with {MAX_THREADS} threads...")
+        # Imported here: crawler builds on the parsers above
+        from crawler import HOST_CONCURRENCY, collect_all
+        
+        logger.info(f"🚀 Starting Enhanced Tamil Nadu Safety Analysis ({HOST_CONCURRENCY} requests per host)...")
         logger.info(f"📊 Processing {len(items)} assembly constituencies...")
         
-        with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-            futures = {executor.submit(analyze_location_enhanced, item): item for item in items}
-            
-            for i, future in enumerate(as_completed(futures), 1):
-                result = future.result()
-                if result:
-                    results.append(result)
-                
-                # Progress indicator
-                if i % 10 == 0:
-                    logger.info(f"📈 Progress: {i}/{len(items)} locations processed")
+        results = [result for result in asyncio.run(collect_all(items)) if result]
         
         if results:
             df = pd.DataFrame(results)
@@ -539,8 +541,9 @@ def main():
             df = categorize_zone_enhanced(df)
             
             # Generate comprehensive Excel report
+            # Next to the datasets, where datastore.latest_report finds it on the backend's next start
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            excel_filename = f"tn_enhanced_safety_analysis_{timestamp}.xlsx"
+            excel_filename = os.path.join(BASE_DIR, f"{REPORT_PREFIX}{timestamp}.xlsx")
             
             with pd.ExcelWriter(excel_filename, engine='xlsxwriter') as writer:
                 # Main data sheet
@@ -566,8 +569,13 @@ def main():
                 df.head(10).to_excel(writer, sheet_name='Top 10 Safest', index=False)
                 df.tail(10).to_excel(writer, sheet_name='Top 10 Riskiest', index=False)
             
+            # Columnar copy of the main sheet, which the backend reads instead of the xlsx
+            parquet_filename = write_columnar(df, excel_filename)
+            
             logger.info(f"✅ Enhanced analysis complete!")
             logger.info(f"📊 Excel report saved: {excel_filename}")
+            if parquet_filename:
+                logger.info(f"📦 Parquet copy saved: {parquet_filename}")
             logger.info(f"📈 Total crime incidents found: {df['Total_Crime_Count'].sum()}")
             logger.info(f"🎯 Average safety score: {df['Safety_Score'].mean():.3f}")
             
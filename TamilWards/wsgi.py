@@ -0,0 +1,16 @@
+"""Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:app`` from this directory.
+
+With ``preload_app`` the module is imported once in the gunicorn master, so
+everything built in warm() is inherited by the forked workers copy-on-write
+instead of being parsed again in every worker.
+"""
+import gc
+
+from backend import app
+from route_service import warm
+
+warm()
+
+# Move the warmed objects out of the collector's generations so that GC passes
+# in the workers don't touch (and thereby copy) the shared pages
+gc.freeze()
@@ -0,0 +1,142 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from datastore import EXCEL_FILE, GEOJSON_FILE, store
+
+# Classification scheme: 'quantile', 'jenks' (natural breaks) or 'fixed' (ZONE_THRESHOLDS)
+ZONE_SCHEME = os.environ.get('ZONE_SCHEME', 'quantile').lower()
+# Comma-separated upper bounds of every class but the last, for ZONE_SCHEME=fixed: "5,15" for the
+# 3-zone map palette, "5,10,20" for the 4-zone web.py report
+ZONE_THRESHOLDS = os.environ.get('ZONE_THRESHOLDS', '')
+ZONE_THRESHOLDS_ENHANCED = os.environ.get('ZONE_THRESHOLDS_ENHANCED', '')
+
+SCHEMES = ('quantile', 'jenks', 'fixed')
+
+
+# Labels and colours per class (safest first), the quantiles used by the quantile scheme and
+# the thresholds used by the fixed one
+Palette = namedtuple('Palette', 'labels colors quantiles thresholds')
+
+PALETTES = {
+    # Map layers: backend, generate_map, placename
+    'map': Palette(('Safe Zone', 'Moderate Zone', 'Risky Zone'),
+                   ('#FFFF00', '#FFA500', '#FF0000'),
+                   (0.25, 0.5), ZONE_THRESHOLDS),
+    # web.py report
+    'enhanced': Palette(('Safe Zone', 'Low Risk Zone', 'Moderate Zone', 'High Risk Zone'),
+                        ('#00FF00', '#FFFF00', '#FFA500', '#FF0000'),
+                        (0.25, 0.5, 0.75), ZONE_THRESHOLDS_ENHANCED),
+}
+
+# Environment variable behind each palette's thresholds, for error messages
+THRESHOLD_SETTINGS = {'map': 'ZONE_THRESHOLDS', 'enhanced': 'ZONE_THRESHOLDS_ENHANCED'}
+
+
+def scheme_signature(scheme=ZONE_SCHEME, palette='map'):
+    """Identifies the configured classification in cache keys and file versions."""
+    return f"fixed:{PALETTES[palette].thresholds}" if scheme == 'fixed' else scheme
+
+
+def jenks_breaks(values, classes):
+    """Fisher-Jenks natural breaks: upper bounds of the first ``classes - 1`` classes.
+
+    Exact dynamic programme over the sorted values, minimising the summed
+    within-class squared deviation; the inner minimisation is vectorized.
+    """
+    x = np.sort(np.asarray(values, dtype=float))
+    x = x[~np.isnan(x)]
+    n = len(x)
+    if n <= classes:
+        return x[:max(0, classes - 1)]
+
+    s1 = np.concatenate([[0.0], np.cumsum(x)])
+    s2 = np.concatenate([[0.0], np.cumsum(x * x)])
+    cost = np.full((classes + 1, n + 1), np.inf)
+    cost[0, 0] = 0.0
+    split = np.zeros((classes + 1, n + 1), dtype=np.int64)
+
+    for c in range(1, classes + 1):
+        for j in range(c, n + 1):
+            # Last class is x[i:j] for every feasible start i
+            i = np.arange(c - 1, j)
+            total = s1[j] - s1[i]
+            ssd = (s2[j] - s2[i]) - total * total / (j - i)
+            candidates = cost[c - 1, i] + ssd
+            best = int(np.argmin(candidates))
+            cost[c, j] = candidates[best]
+            split[c, j] = i[best]
+
+    bounds = []
+    j = n
+    for c in range(classes, 1, -1):
+        j = split[c, j]
+        bounds.append(x[j - 1])
+    return np.array(bounds[::-1])
+
+
+def fixed_breaks(palette='map'):
+    classes, thresholds = len(PALETTES[palette].labels), PALETTES[palette].thresholds
+    setting = THRESHOLD_SETTINGS[palette]
+    try:
+        bounds = [float(t) for t in thresholds.split(',') if t.strip()]
+    except ValueError:
+        raise ValueError(f"{setting} must be comma-separated numbers, got '{thresholds}'")
+    if len(bounds) != classes - 1:
+        raise ValueError(f"{setting} needs {classes - 1} comma-separated values for {classes} zones")
+    return np.array(sorted(bounds))
+
+
+def check_scheme(scheme=ZONE_SCHEME, palette='map'):
+    """Raise ValueError now if ``scheme`` can't classify with ``palette``, instead of at first use."""
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown zone scheme '{scheme}', expected one of {SCHEMES}")
+    if scheme == 'fixed':
+        fixed_breaks(palette)
+
+
+def breaks(values, scheme=ZONE_SCHEME, palette='map'):
+    """Class upper bounds for ``values``; a value above the last bound falls in the last class."""
+    if scheme == 'quantile':
+        return np.nanquantile(np.asarray(values, dtype=float), PALETTES[palette].quantiles)
+    if scheme == 'jenks':
+        return jenks_breaks(values, len(PALETTES[palette].labels))
+    if scheme == 'fixed':
+        return fixed_breaks(palette)
+    raise ValueError(f"Unknown zone scheme '{scheme}', expected one of {SCHEMES}")
+
+
+def classify(values, scheme=ZONE_SCHEME, palette='map'):
+    """Class index of each value: 0 for ``<= breaks[0]``, 1 for ``<= breaks[1]``, ...
+
+    Missing values land in the last (riskiest) class, as with the old
+    per-row comparisons.
+    """
+    values = np.asarray(values, dtype=float)
+    return np.digitize(values, breaks(values, scheme, palette), right=True)
+
+
+def categorize(df, scheme=ZONE_SCHEME, palette='map', column='Total_Crime_Count',
+               zone_column='Zone', color_column='Zone_Color'):
+    """Copy of ``df`` with zone label and colour columns, from one vectorized pass."""
+    classes = classify(df[column].to_numpy(), scheme, palette)
+    labels = np.asarray(PALETTES[palette].labels, dtype=object)
+    colors = np.asarray(PALETTES[palette].colors, dtype=object)
+    return df.assign(**{zone_column: labels[classes], color_column: colors[classes]})
+
+
+def get_zones(scheme=ZONE_SCHEME, excel_file=EXCEL_FILE):
+    """Zone and colour per (DIST_NAME, AC_NAME), classified once per dataset version."""
+    def build():
+        df = categorize(store.read_excel(excel_file), scheme)
+        return df[['DIST_NAME', 'AC_NAME', 'Zone', 'Zone_Color']].drop_duplicates(['DIST_NAME', 'AC_NAME'])
+    return store.derived(('zones', scheme, excel_file), [excel_file], build)
+
+
+def get_ward_zones(scheme=ZONE_SCHEME):
+    """Zone and colour aligned with the ward (WardIndex) positions; NaN where a ward has no data."""
+    def build():
+        wards = store.read_geojson(GEOJSON_FILE)
+        return wards[['DIST_NAME', 'AC_NAME']].merge(get_zones(scheme), on=['DIST_NAME', 'AC_NAME'], how='left')
+    return store.derived(('ward_zones', scheme), [GEOJSON_FILE, EXCEL_FILE], build)
@@ -68,10 +68,10 @@ const DestinationInput = ({ onRouteGenerated }) => {
                 const response = await fetch(url);
                 console.log('Safety Map Request URL:', url);
                 if (!response.ok) throw new Error(`Failed to generate safety map: ${response.status} - ${await response.text()}`);
-                const filename = await response.text();  // Will be 'tamilnadu_route_map.html'
+                const { filename } = await response.json();  // Content-addressed, e.g. 'route_<hash>.html'
                 routeData = { filename, isSafetyMap: true, fromLocation, toLocation, transportMode };
             } else {
-                const url = `http://localhost:5001/generate_route?from=${encodeURIComponent(fromLocation)}&to=${encodeURIComponent(toLocation)}&mode=${transportMode}`;
+                const url = `http://localhost:5001/generate_route?from=${encodeURIComponent(fromLocation)}&to=${encodeURIComponent(toLocation)}&mode=${transportMode}&render=true`;
                 const response = await fetch(url);
                 console.log('Normal Map Request URL:', url);
                 if (!response.ok) {
@@ -23,7 +23,7 @@ const MapView = ({ userId, onSimulateConnectionLoss }) => {
   const toLocation = route.toLocation || "Chennai";
   const transportMode = route.transportMode || "car";
   const isSafetyMap = route.isSafetyMap || false;
-  const filename = route.filename || "tamilnadu_route_map.html";  // Fixed filename
+  const filename = route.filename;  // Per-route file written by the backend
   const directions = Array.isArray(route.directions) && route.directions.length > 0 ? route.directions : [[13.0827, 80.2707], [13.0827, 80.2707]]; // Fallback to straight line
 
   // Default coordinates based on routeData or Chennai
@@ -226,7 +226,7 @@ const MapView = ({ userId, onSimulateConnectionLoss }) => {
         {/* Heatmap */}
         <div className={`heatmap-container ${isHeatmapMain ? "full" : "thumbnail"}`}>
           <iframe
-            src={isSafetyMap ? `/public/${filename}` : "/public/tamilnadu_route_map.html"}  // Consistent filename
+            src={`/public/${filename}`}
             title="Heatmap"
             style={{
               height: "100%",